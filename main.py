@@ -4,7 +4,7 @@ A* Pathfinding Visualization - Main Script
 """
 import argparse
 import sys
-from src.data.graph import get_city_graph, get_diverse_nodes
+from src.data.graph import get_city_graph, get_diverse_nodes, warm_caches
 from src.visualization.map_viz import visualize_realtime_search
 from src.utils.helpers import Timer, create_directories, print_graph_info
 from src.algorithms.astar import HeuristicType
@@ -54,6 +54,9 @@ def parse_args():
                         help='Do not save the final result')
     parser.add_argument('--no-gif', action='store_true',
                         help='Do not save animation as GIF')
+    parser.add_argument('--warm-cache', nargs='*', metavar='CITY',
+                        help='Download and cache the named cities (presets or full names) in parallel, '
+                             'or the selected city if none are named, then exit')
     
     return parser.parse_args()
 
@@ -73,6 +76,16 @@ def main():
     # Create necessary directories
     create_directories([args.output_dir, args.data_dir])
     
+    # Cache the requested cities up front if asked to
+    if args.warm_cache is not None:
+        city_names = [CITY_PRESETS.get(name, name) for name in args.warm_cache] or [city_name]
+        with Timer("Caching cities"):
+            failed = warm_caches(city_names, cache_dir=args.data_dir)
+        if failed:
+            print(f"Could not cache: {'; '.join(failed)}")
+            sys.exit(1)
+        return
+    
     # Get city graph with error handling
     try:
         with Timer(f"Loading graph for {city_name}"):
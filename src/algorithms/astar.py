@@ -1,12 +1,15 @@
 """
 A* Pathfinding Algorithm Implementation
 """
-import heapq
-import osmnx as ox
+import array
 import time
 import math
 import numpy as np
 from enum import Enum
+from numba import njit
+
+# Mean Earth radius in meters (same value OSMnx uses for great-circle distances)
+EARTH_RADIUS_M = 6371009
 
 class HeuristicType(Enum):
     """Available heuristics"""
@@ -17,13 +20,14 @@ class HeuristicType(Enum):
     CUSTOM = 5         # Custom function if needed
 
 class UpdateType(Enum):
-    """Type of update sent from algorithm thread to visualization thread"""
+    """Type of update sent from the algorithm to the visualization"""
     VISITED_NODE = 1
     OPEN_SET = 2
     PATH_UPDATE = 3
     COMPLETE = 4
     PROGRESS = 5
     SAVE_GIF = 6
+    OPEN_SET_DELTA = 7
 
 def calculate_heuristic(G, current, target, heuristic_type=HeuristicType.HAVERSINE, custom_heuristic=None):
     """
@@ -39,35 +43,295 @@ def calculate_heuristic(G, current, target, heuristic_type=HeuristicType.HAVERSI
     Returns:
         Estimated cost from current to target
     """
+    if heuristic_type == HeuristicType.CUSTOM and custom_heuristic:
+        # Use provided custom heuristic function
+        return custom_heuristic(G, current, target)
+    
     current_y, current_x = G.nodes[current]['y'], G.nodes[current]['x']
     target_y, target_x = G.nodes[target]['y'], G.nodes[target]['x']
     
-    if heuristic_type == HeuristicType.EUCLIDEAN:
-        # Simple straight-line distance
-        # Less accurate for large distances but computationally efficient
-        return math.sqrt((target_y - current_y)**2 + (target_x - current_x)**2) * 111000  # approx meters
+    # Default to Haversine distance if type not recognized or custom function not provided
+    return float(_heuristic_table(current_y, current_x, target_y, target_x, heuristic_type))
+
+def _heuristic_table(lat, lon, dst_lat, dst_lon, heuristic_type=HeuristicType.HAVERSINE, cos_lat=None):
+    """
+    Evaluate a built-in heuristic for every node in one vectorized pass
+    
+    Also works on scalar coordinates, for a single node.
+    
+    Args:
+        lat: Array of node latitudes in degrees
+        lon: Array of node longitudes in degrees
+        dst_lat: Latitude of the target node
+        dst_lon: Longitude of the target node
+        heuristic_type: Type of heuristic to use
+        cos_lat: Optional precomputed cosine of the node latitudes (haversine only)
         
+    Returns:
+        Array of estimated costs (meters) from each node to the target
+    """
+    d_lat = dst_lat - lat
+    d_lon = dst_lon - lon
+    
+    if heuristic_type == HeuristicType.EUCLIDEAN:
+        return np.hypot(d_lat, d_lon) * 111000.0
     elif heuristic_type == HeuristicType.MANHATTAN:
-        # Sum of absolute differences (better for grid-like street networks)
-        return (abs(target_y - current_y) + abs(target_x - current_x)) * 111000  # approx meters
-        
+        return (np.abs(d_lat) + np.abs(d_lon)) * 111000.0
     elif heuristic_type == HeuristicType.DIAGONAL:
-        # Allows diagonal movement (faster than Manhattan)
-        dx = abs(target_x - current_x)
-        dy = abs(target_y - current_y)
-        return max(dx, dy) * 111000  # approx meters
+        return np.maximum(np.abs(d_lon), np.abs(d_lat)) * 111000.0
+    
+    # Haversine, also the default for unrecognized types. Destination terms are
+    # evaluated once as scalars and cos(lat) of the nodes does not depend on the target
+    if cos_lat is None:
+        cos_lat = np.cos(np.radians(lat))
+    dst_cos = math.cos(math.radians(dst_lat))
+    a = np.sin(np.radians(d_lat) * 0.5)**2 + (cos_lat * dst_cos) * np.sin(np.radians(d_lon) * 0.5)**2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+def _average_edge_length(G):
+    """
+    Mean edge length in meters, computed once and cached on the graph
+    
+    Args:
+        G: NetworkX graph
+        
+    Returns:
+        float: Average of the edges' 'length' attribute
+    """
+    if '_avg_edge_length' not in G.graph:
+        lengths = np.fromiter((data.get('length', 1.0) for _, _, data in G.edges(data=True)),
+                              dtype=np.float64)
+        G.graph['_avg_edge_length'] = float(lengths.mean()) if len(lengths) else 1.0
+    return G.graph['_avg_edge_length']
+
+def _index_graph(G, weight='travel_time'):
+    """
+    Flatten a graph into Structure-of-Arrays form for the search loop
+    
+    Nodes are renumbered 0..N-1 in G.nodes() order and adjacency is stored in
+    CSR form (see graph_to_soa), using the arrays persisted with the graph
+    cache when get_city_graph loaded them. The result is
+    cached per weight attribute in G.graph['_soa_cache'] and its arrays are
+    read-only, so repeated searches on the same graph share it (the graph is
+    assumed not to change once it has been searched).
+    
+    Args:
+        G: NetworkX graph
+        weight: Edge attribute to use as edge cost
         
-    elif heuristic_type == HeuristicType.HAVERSINE:
-        # Great circle distance (accounts for Earth's curvature)
-        # Most accurate for geographic routing
-        return ox.distance.great_circle(current_y, current_x, target_y, target_x)
+    Returns:
+        tuple: (lat, lon, cos_lat, node_ids, idx_of, indptr, nbr_idx, edge_w)
+    """
+    # Imported here rather than at the top: the algorithm process only needs run_search,
+    # and importing the graph module would pull in OSMnx there
+    from src.data.graph import get_graph_soa
+    
+    cache = G.graph.setdefault('_soa_cache', {})
+    if weight in cache:
+        return cache[weight]
+    
+    # Shares the arrays persisted alongside the graph cache if they were loaded with it
+    soa = get_graph_soa(G, weight)
+    
+    node_ids, indptr, nbr_idx, edge_w = soa['node_ids'], soa['indptr'], soa['nbr_idx'], soa['edge_w']
+    idx_of = dict(zip(node_ids.tolist(), range(len(node_ids))))
+    lon = np.ascontiguousarray(soa['node_xy'][:, 0])
+    lat = np.ascontiguousarray(soa['node_xy'][:, 1])
+    cos_lat = np.cos(np.radians(lat))
+    
+    for arr in (lat, lon, cos_lat, node_ids, indptr, nbr_idx, edge_w):
+        arr.flags.writeable = False
+    
+    cache[weight] = (lat, lon, cos_lat, node_ids, idx_of, indptr, nbr_idx, edge_w)
+    return cache[weight]
+
+def _route_cost_arrays(G):
+    """
+    Length and travel time of every edge in CSR order, computed once and cached on the graph
+    
+    The arrays line up with the edge_w arrays of _index_graph (key-0 edges in
+    G.adjacency() order), so route statistics can be summed without the graph.
+    Missing attributes count as 0.
+    
+    Args:
+        G: NetworkX graph
         
-    elif heuristic_type == HeuristicType.CUSTOM and custom_heuristic:
-        # Use provided custom heuristic function
-        return custom_heuristic(G, current, target)
+    Returns:
+        tuple: (edge_length, edge_time) float64 arrays
+    """
+    if '_route_costs' not in G.graph:
+        edges = [edges[0] for _, nbrs in G.adjacency() for edges in nbrs.values()]
+        edge_length = np.fromiter((e.get('length', 0) for e in edges), dtype=np.float64, count=len(edges))
+        edge_time = np.fromiter((e.get('travel_time', 0) for e in edges), dtype=np.float64, count=len(edges))
+        G.graph['_route_costs'] = (edge_length, edge_time)
+    return G.graph['_route_costs']
+
+def _reconstruct_path(came_from, node_ids, start, node):
+    """
+    Walk the predecessor array back from a node to the start
+    
+    Args:
+        came_from: Array of predecessor indices, only valid for reached nodes
+        node_ids: Array mapping indices back to node IDs
+        start: Index of the start node
+        node: Index of the last node on the path
         
-    # Default to Haversine distance if type not recognized or custom function not provided
-    return ox.distance.great_circle(current_y, current_x, target_y, target_x)
+    Returns:
+        list: Node IDs from the start node to the given node
+    """
+    path = [node]
+    while node != start:
+        node = came_from[node]
+        path.append(node)
+    path.reverse()
+    return node_ids[path].tolist()
+
+# Bucket (calendar) queue layout: f-scores are grouped into buckets of _BUCKET_WIDTH
+# and the buckets are kept in a ring of _BUCKET_SLOTS linked lists, so a push is O(1)
+# and a pop only scans the short list of the current bucket's slot
+_BUCKET_WIDTH = 1.0
+_BUCKET_SLOTS = 4096
+
+# Indices into the queue's int64 state array
+_PQ_SIZE = 0     # live entries
+_PQ_USED = 1     # entries allocated from the pool
+_PQ_CURRENT = 2  # bucket the next pop starts scanning from
+_PQ_SEQ = 3      # last sequence number handed out
+
+def _bucket_queue(capacity):
+    """
+    Allocate an empty bucket queue able to hold the given number of pushes
+    
+    Args:
+        capacity: Maximum number of entries ever pushed
+        
+    Returns:
+        tuple: (heads, ent_f, ent_seq, ent_node, ent_bucket, ent_next, state)
+    """
+    return (
+        np.full(_BUCKET_SLOTS, -1, dtype=np.int64),
+        np.empty(capacity, dtype=np.float64),
+        np.empty(capacity, dtype=np.int64),
+        np.empty(capacity, dtype=np.int64),
+        np.empty(capacity, dtype=np.int64),
+        np.empty(capacity, dtype=np.int64),
+        np.zeros(4, dtype=np.int64),
+    )
+
+@njit(cache=True)
+def _bucket_push(pq, f, node):
+    """Push a node with its f-score, ties are broken by insertion order"""
+    heads, ent_f, ent_seq, ent_node, ent_bucket, ent_next, state = pq
+    e = state[_PQ_USED]
+    state[_PQ_USED] += 1
+    state[_PQ_SEQ] += 1
+    bucket = int(f / _BUCKET_WIDTH)
+    slot = bucket & (_BUCKET_SLOTS - 1)
+    ent_f[e] = f
+    ent_seq[e] = state[_PQ_SEQ]
+    ent_node[e] = node
+    ent_bucket[e] = bucket
+    ent_next[e] = heads[slot]
+    heads[slot] = e
+    state[_PQ_SIZE] += 1
+    # f-scores are not monotone with an inconsistent heuristic, so the scan may move back
+    if state[_PQ_SIZE] == 1 or bucket < state[_PQ_CURRENT]:
+        state[_PQ_CURRENT] = bucket
+
+@njit(cache=True)
+def _bucket_pop(pq):
+    """Pop the entry with the smallest (f-score, sequence), returning (f_score, node)"""
+    heads, ent_f, ent_seq, ent_node, ent_bucket, ent_next, state = pq
+    current = state[_PQ_CURRENT]
+    scanned = 0
+    while True:
+        slot = current & (_BUCKET_SLOTS - 1)
+        best = -1
+        best_prev = -1
+        prev = -1
+        e = heads[slot]
+        while e != -1:
+            # Slots are shared by buckets one ring-length apart, only take the current one
+            if ent_bucket[e] == current and (
+                best == -1 or ent_f[e] < ent_f[best]
+                or (ent_f[e] == ent_f[best] and ent_seq[e] < ent_seq[best])
+            ):
+                best = e
+                best_prev = prev
+            prev = e
+            e = ent_next[e]
+        
+        if best != -1:
+            if best_prev == -1:
+                heads[slot] = ent_next[best]
+            else:
+                ent_next[best_prev] = ent_next[best]
+            state[_PQ_SIZE] -= 1
+            state[_PQ_CURRENT] = current
+            return ent_f[best], ent_node[best]
+        
+        current += 1
+        scanned += 1
+        if scanned == _BUCKET_SLOTS:
+            # A whole lap of empty buckets, jump straight to the smallest occupied one
+            current = -1
+            for s in range(_BUCKET_SLOTS):
+                e = heads[s]
+                while e != -1:
+                    if current == -1 or ent_bucket[e] < current:
+                        current = ent_bucket[e]
+                    e = ent_next[e]
+            scanned = 0
+
+@njit(cache=True)
+def _astar_core(indptr, nbr_idx, edge_w, h_table, dst,
+                g_score, came_from, closed, pq, visited_out, discovered_out, max_expansions):
+    """
+    Compiled A* inner loop, resumable in chunks of node expansions
+    
+    All search state lives in the arrays passed in and is updated in place, so
+    the Python driver can call this repeatedly and publish progress between
+    calls. pq is the bucket queue tuple from _bucket_queue.
+    
+    Returns:
+        tuple: (n_visited, n_discovered, found) - number of node indices
+        written to visited_out, number of first-time reached node indices
+        written to discovered_out, and whether dst was reached
+    """
+    state = pq[6]
+    n_visited = 0
+    n_discovered = 0
+    found = False
+    
+    while state[_PQ_SIZE] > 0 and n_visited < max_expansions:
+        f, current = _bucket_pop(pq)
+        # f is only stored in the queue; g + h reproduces it exactly for the latest entry.
+        # An entry whose f rounds equal to a later one's passes that test, so also skip
+        # nodes that were already expanded
+        if closed[current] or f > g_score[current] + h_table[current]:
+            continue  # Stale entry, the node was pushed again with a better score
+        closed[current] = True
+        visited_out[n_visited] = current
+        n_visited += 1
+        
+        if current == dst:
+            found = True
+            break
+        
+        for k in range(indptr[current], indptr[current + 1]):
+            neighbor = nbr_idx[k]
+            if closed[neighbor]:
+                continue
+            tentative_g = g_score[current] + edge_w[k]
+            if tentative_g < g_score[neighbor]:
+                if g_score[neighbor] == np.inf:
+                    discovered_out[n_discovered] = neighbor
+                    n_discovered += 1
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g
+                _bucket_push(pq, tentative_g + h_table[neighbor], neighbor)
+    
+    return n_visited, n_discovered, found
 
 def a_star_realtime(G, start_node, end_node, update_queue, stop_event, weight='travel_time', heuristic_type=HeuristicType.HAVERSINE,
                    custom_heuristic=None):
@@ -78,185 +342,202 @@ def a_star_realtime(G, start_node, end_node, update_queue, stop_event, weight='t
         G: NetworkX graph
         start_node: Starting node ID
         end_node: Destination node ID
-        update_queue: Queue to send updates to visualization thread
-        stop_event: Threading event to signal algorithm to stop
+        update_queue: Queue to send updates to the visualization
+        stop_event: Threading or multiprocessing event to signal algorithm to stop
         weight: Edge weight attribute to use (default: 'travel_time')
         heuristic_type: Type of heuristic to use for estimating remaining cost
         custom_heuristic: Custom heuristic function (if heuristic_type is CUSTOM)
         
+    Returns:
+        list or None: Node IDs of the path found, or None
+        
     The function will put updates into the queue in the format:
     (UpdateType.XXXX, data) where data depends on the update type.
     """
-    # Hardcoded visualization parameters
-    update_interval = 5
-    node_delay = 0.02    
-    batch_size = 5       
-    target_runtime = 8.0 
+    search = prepare_search(G, start_node, end_node, weight, heuristic_type, custom_heuristic)
+    return run_search(search, update_queue, stop_event)
+
+def prepare_search(G, start_node, end_node, weight='travel_time', heuristic_type=HeuristicType.HAVERSINE,
+                   custom_heuristic=None):
+    """
+    Build everything run_search needs from the graph
     
+    Everything that touches G happens here, so it can run in the visualization
+    process where the graph's caches persist, while run_search runs elsewhere
+    with only these arrays.
+    
+    Args:
+        G: NetworkX graph
+        start_node: Starting node ID
+        end_node: Destination node ID
+        weight: Edge weight attribute to use (default: 'travel_time')
+        heuristic_type: Type of heuristic to use for estimating remaining cost
+        custom_heuristic: Custom heuristic function (if heuristic_type is CUSTOM)
+        
+    Returns:
+        dict: CSR arrays, heuristic table, start/end indices and search settings
+    """
     # Estimate the number of nodes we'll explore based on straight-line distance
     start_y, start_x = G.nodes[start_node]['y'], G.nodes[start_node]['x']
     end_y, end_x = G.nodes[end_node]['y'], G.nodes[end_node]['x']
     
     # Calculate the direct distance between points
-    h_distance = ox.distance.great_circle(start_y, start_x, end_y, end_x)
+    h_distance = float(_heuristic_table(start_y, start_x, end_y, end_x))
     
-    # Estimate nodes to explore based on distance and graph density
+    # Estimate nodes to explore (for progress updates): A* covers roughly an area that
+    # grows with the square of the straight-line distance measured in edges
+    avg_edge_length = _average_edge_length(G)
     estimated_nodes = min(
-        3000,  # Cap to avoid excessive delays on short paths
+        len(G),
         max(
-            300,  # Minimum nodes to ensure smooth visualization
-            int(h_distance * 5)  # Scale factor based on distance
+            300,
+            int(3 * (h_distance / avg_edge_length) ** 2)
         )
     )
     
-    # Calculate adaptive delay for target runtime
-    batches = math.ceil(estimated_nodes / batch_size)
-    adaptive_delay = target_runtime / batches if batches > 0 else node_delay
+    # Flat arrays indexed by node position instead of per-node dict lookups
+    lat, lon, cos_lat, node_ids, idx_of, indptr, nbr_idx, edge_w = _index_graph(G, weight)
+    edge_length, edge_time = _route_cost_arrays(G)
     
-    # Use the adaptive delay, but cap it to prevent extreme values
-    node_delay = min(max(adaptive_delay, 0.001), 0.1)  # Reduced max delay
+    # Heuristic for every node up front: one vectorized NumPy pass for the built-in
+    # heuristics, so the compiled core only does an array load per neighbor
+    if heuristic_type == HeuristicType.CUSTOM and custom_heuristic is not None:
+        h_table = np.fromiter((custom_heuristic(G, node, end_node) for node in G.nodes()),
+                              dtype=np.float64, count=len(node_ids))
+    else:
+        h_table = _heuristic_table(lat, lon, end_y, end_x, heuristic_type, cos_lat)
     
-    # Track the nodes in the open set (frontier)
-    open_set_nodes = set([start_node])
+    return {
+        'node_ids': node_ids, 'indptr': indptr, 'nbr_idx': nbr_idx, 'edge_w': edge_w,
+        'edge_length': edge_length, 'edge_time': edge_time, 'h_table': h_table,
+        'start': idx_of[start_node], 'end': idx_of[end_node],
+        'estimated_nodes': estimated_nodes, 'heuristic_name': heuristic_type.name,
+    }
+
+def run_search(search, update_queue, stop_event):
+    """
+    Run A* on a search built by prepare_search, streaming updates to the visualization
+    
+    Args:
+        search: Dict returned by prepare_search
+        update_queue: Queue to send updates to the visualization
+        stop_event: Threading or multiprocessing event to signal algorithm to stop
+        
+    Returns:
+        list or None: Node IDs of the path found, or None
+    """
+    # Hardcoded visualization parameters; the search itself runs at full speed and
+    # the visualization paces the replay of these batches
+    batch_size = 10
     
-    # Priority queue with (f_score, node_counter, node_id)
-    node_sequence = 0
-    open_set = [(0, node_sequence, start_node)]
-    heapq.heapify(open_set)
+    node_ids, indptr, nbr_idx, edge_w = search['node_ids'], search['indptr'], search['nbr_idx'], search['edge_w']
+    h_table = search['h_table']
+    start, end = search['start'], search['end']
+    estimated_nodes = search['estimated_nodes']
+    heuristic_name = search['heuristic_name']
+    n = len(node_ids)
     
     # Cost from start to current node
-    g_score = {node: float('inf') for node in G.nodes()}
-    g_score[start_node] = 0
+    g_score = np.full(n, np.inf)
+    g_score[start] = 0
     
-    # Estimated total cost
-    f_score = {node: float('inf') for node in G.nodes()}
+    # Bucket priority queue of (f_score, sequence, node_index). Improved nodes are
+    # pushed again and stale entries skipped on pop; every edge is relaxed at most
+    # once, so there are never more pushes than edges plus the start.
+    pq = _bucket_queue(len(nbr_idx) + 1)
+    _bucket_push(pq, g_score[start] + h_table[start], start)
     
-    # Initial f_score estimate
-    initial_h = calculate_heuristic(G, start_node, end_node, heuristic_type, custom_heuristic)
-    f_score[start_node] = initial_h
+    # To reconstruct path (predecessor index); walks stop at the start node, so
+    # entries of unreached nodes are never read
+    came_from = np.empty(n, dtype=np.int64)
     
-    # To reconstruct path
-    came_from = {}
+    # Expanded nodes, so neighbors can be skipped without scanning the visited list
+    closed = np.zeros(n, dtype=np.bool_)
+    
+    # Node indices expanded during one call into the compiled core
+    visited_buf = np.empty(batch_size, dtype=np.int64)
+    
+    # Node indices reached for the first time during one call; each expansion can
+    # discover at most its out-degree worth of nodes
+    max_degree = int(np.diff(indptr).max()) if n else 0
+    discovered_buf = np.empty(batch_size * max_degree, dtype=np.int64)
+    
+    # Nodes the visualization currently holds in its open set, so each batch only
+    # sends what entered and left the frontier
+    in_open_set = np.zeros(n, dtype=np.bool_)
     
     # Local visited nodes list
-    local_visited = []
+    # Contiguous int64 buffer rather than a list of boxed ints; converted to a list only
+    # when it is handed to the visualization
+    local_visited = array.array('q')
     
     # Main search loop
     found_path = None
     node_counter = 0
     batch_counter = 0
-    batch_nodes = []
-    current_path = []
     start_time = time.time()
     
     # Log starting parameters
-    print(f"Starting A* with {heuristic_type.name} heuristic")
-    
-    # Add the start node to visited nodes
-    local_visited.append(start_node)
-    batch_nodes.append(start_node)
+    print(f"Starting A* with {heuristic_name} heuristic")
     
-    while open_set and not stop_event.is_set():
+    while pq[6][_PQ_SIZE] > 0 and not stop_event.is_set():
         # Process a batch of nodes
         batch_counter += 1
-        batch_start_time = time.time()
         
-        # Process up to batch_size nodes at once
-        for _ in range(min(batch_size, len(open_set))):
-            if not open_set or stop_event.is_set():
-                break
-                
-            # Get node with lowest f_score
-            _, _, current_node = heapq.heappop(open_set)
-            if current_node in open_set_nodes:
-                open_set_nodes.remove(current_node)
-            else:
-                continue  # This node was already processed
-            
+        # Expand up to batch_size nodes in compiled code
+        n_visited, n_discovered, found = _astar_core(
+            indptr, nbr_idx, edge_w, h_table, end,
+            g_score, came_from, closed,
+            pq, visited_buf, discovered_buf, batch_size
+        )
+        
+        if n_visited:
             # Add to visited nodes
-            local_visited.append(current_node)
-            batch_nodes.append(current_node)
-            node_counter += 1
+            # Fancy indexing yields a fresh int64 array, so it can go on the queue as-is
+            batch_nodes = node_ids[visited_buf[:n_visited]]
+            local_visited.frombytes(batch_nodes.tobytes())
             
             # Send progress update sparingly (reduced frequency for better performance)
-            if node_counter % 100 == 0:
+            previous_counter = node_counter
+            node_counter += n_visited
+            if node_counter // 100 > previous_counter // 100:
                 progress = min(100, (node_counter / estimated_nodes * 100)) if estimated_nodes > 0 else 0
                 update_queue.put((UpdateType.PROGRESS, progress))
-            
-            # Check if we reached the target
-            if current_node == end_node:
-                # Reconstruct path
-                found_path = [current_node]
-                while current_node in came_from:
-                    current_node = came_from[current_node]
-                    found_path.append(current_node)
-                found_path.reverse()
-                break
-            
-            # Update current best path if needed and not too costly
-            if current_node != start_node and node_counter % 10 == 0:  # Reduced frequency
-                # Build the current best path to the current node
-                current_path = [current_node]
-                temp_node = current_node
-                while temp_node in came_from:
-                    temp_node = came_from[temp_node]
-                    current_path.append(temp_node)
-                current_path.reverse()
-            
-            # Explore neighbors
-            for neighbor in G.neighbors(current_node):
-                if stop_event.is_set():
-                    break
-                    
-                # Skip already visited nodes for performance
-                if neighbor in local_visited:
-                    continue
-                
-                # Calculate basic edge cost from graph
-                edge_cost = G[current_node][neighbor][0].get(weight, 1.0)
-                
-                # Calculate tentative g_score
-                tentative_g = g_score[current_node] + edge_cost
-                
-                if tentative_g < g_score[neighbor]:
-                    # This path is better
-                    came_from[neighbor] = current_node
-                    g_score[neighbor] = tentative_g
-                    
-                    # Calculate heuristic using the selected method
-                    h = calculate_heuristic(G, neighbor, end_node, heuristic_type, custom_heuristic)
-                    
-                    # Calculate f_score (g + h)
-                    f_score[neighbor] = tentative_g + h
-                    
-                    # Add to open set if not already there
-                    if neighbor not in open_set_nodes:
-                        node_sequence += 1
-                        heapq.heappush(open_set, (f_score[neighbor], node_sequence, neighbor))
-                        open_set_nodes.add(neighbor)
         
-        # Send the batch updates to the visualization less frequently
-        if batch_nodes and batch_counter % 2 == 0:  # Reduced frequency
+        # Check if we reached the target
+        if found:
+            found_path = _reconstruct_path(came_from, node_ids, start, end)
+        
+        # Send the batch updates to the visualization
+        if n_visited:
             # Send all visited nodes in this batch as one update
-            update_queue.put((UpdateType.VISITED_NODE, batch_nodes.copy()))
-            batch_nodes.clear()
+            update_queue.put((UpdateType.VISITED_NODE, batch_nodes))
             
-            # Update current best path
-            if current_path:
-                update_queue.put((UpdateType.PATH_UPDATE, current_path))
+            # Send the (node, parent) links of the newly expanded nodes instead of a full
+            # path; the visualization rebuilds the current best path only when it renders
+            expanded_idx = visited_buf[:n_visited]
+            expanded_idx = expanded_idx[expanded_idx != start]
+            if len(expanded_idx):
+                links = list(zip(node_ids[expanded_idx].tolist(),
+                                 node_ids[came_from[expanded_idx]].tolist()))
+                update_queue.put((UpdateType.PATH_UPDATE, links))
             
-            # Send open set updates periodically
-            if batch_counter % update_interval == 0:
-                update_queue.put((UpdateType.OPEN_SET, list(open_set_nodes)))
+            # Send the change to the open set instead of a full snapshot: nodes reached
+            # for the first time (unless already expanded in this batch) were added, and
+            # expanded nodes the visualization had in its open set were removed
+            discovered = discovered_buf[:n_discovered]
+            added = discovered[~closed[discovered]]
+            expanded = visited_buf[:n_visited]
+            removed = expanded[in_open_set[expanded]]
+            in_open_set[removed] = False
+            in_open_set[added] = True
+            if len(added) or len(removed):
+                update_queue.put((UpdateType.OPEN_SET_DELTA,
+                                  (node_ids[added].tolist(), node_ids[removed].tolist())))
         
         # If we found a path, break out of the loop
         if found_path:
             break
-
-        # Apply a small delay for visualization
-        batch_elapsed = time.time() - batch_start_time
-        if batch_elapsed < node_delay:
-            time.sleep(node_delay - batch_elapsed)
     
     # Log final timing info
     elapsed = time.time() - start_time
@@ -264,33 +545,36 @@ def a_star_realtime(G, start_node, end_node, update_queue, stop_event, weight='t
     
     # Calculate route statistics if a path was found
     if found_path:
-        # Calculate total distance and estimated time
+        # Calculate total distance and estimated time from the CSR edge of each step
         total_distance = 0
         total_time = 0
         
-        for i in range(len(found_path) - 1):
-            u, v = found_path[i], found_path[i + 1]
-            if u in G and v in G[u]:
-                edge_data = G[u][v][0]
-                total_distance += edge_data.get('length', 0)
-                total_time += edge_data.get('travel_time', 0)
+        steps = [end]
+        while steps[-1] != start:
+            steps.append(came_from[steps[-1]])
+        steps.reverse()
+        
+        for u, v in zip(steps[:-1], steps[1:]):
+            k = indptr[u] + np.flatnonzero(nbr_idx[indptr[u]:indptr[u + 1]] == v)[0]
+            total_distance += float(search['edge_length'][k])
+            total_time += float(search['edge_time'][k])
         
         print(f"Route statistics: {len(found_path)} nodes, {total_distance:.2f}m, {total_time:.2f}s")
         
         # Send the final update including a signal to save animation as GIF
-        update_queue.put((UpdateType.COMPLETE, (found_path, local_visited, {
+        update_queue.put((UpdateType.COMPLETE, (found_path, local_visited.tolist(), {
             'distance': total_distance,
             'time': total_time,
             'nodes': len(found_path),
             'save_gif': True  # Flag to indicate we want to save a GIF
         })))
         
-        # Request the visualization thread to save the animation as a GIF
-        gif_filename = f"astar_{heuristic_type.name.lower()}_{time.strftime('%Y%m%d_%H%M%S')}.gif"
+        # Request the visualization to save the animation as a GIF
+        gif_filename = f"astar_{heuristic_name.lower()}_{time.strftime('%Y%m%d_%H%M%S')}.gif"
         update_queue.put((UpdateType.SAVE_GIF, gif_filename))
         
     elif not stop_event.is_set():
-        update_queue.put((UpdateType.COMPLETE, ([], local_visited, {
+        update_queue.put((UpdateType.COMPLETE, ([], local_visited.tolist(), {
             'distance': 0,
             'time': 0,
             'nodes': 0
@@ -2,10 +2,29 @@
 Graph data handling functionality
 """
 import os
+import sys
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import mmap
 import pickle
+import networkx as nx
 import osmnx as ox
+import zstandard as zstd
 import numpy as np
 
+# Buffer size for writing the pickled graph cache
+CACHE_BUFFER_SIZE = 1 << 20
+
+# Arrays saved for each graph in Structure-of-Arrays form, and the edge weight they use
+SOA_ARRAYS = ('node_ids', 'node_xy', 'indptr', 'nbr_idx', 'edge_w')
+SOA_WEIGHT = 'travel_time'
+
+# Attribute strings up to this length are interned
+INTERN_MAX_LENGTH = 64
+
+# zstd level for the graph cache (low levels still compress well and decode fastest)
+CACHE_COMPRESSION_LEVEL = 3
+
 # Configure OSMnx
 ox.settings.use_cache = True
 ox.settings.log_console = True
@@ -24,35 +43,377 @@ def get_city_graph(city_name, cache_dir="data"):
     # Make sure cache directory exists
     os.makedirs(cache_dir, exist_ok=True)
     
-    # Get a simplified city name for the cache file to avoid formatting issues
-    simple_city_name = city_name.split(',')[0].lower()
-    
-    # Create cache file path
-    cache_file = os.path.join(cache_dir, f"{simple_city_name}_graph.pkl")
+    cache_file, legacy_cache_file, soa_dir = _cache_paths(city_name, cache_dir)
     
     # Try to load from cache first
-    if os.path.exists(cache_file):
+    for path in (cache_file, legacy_cache_file):
+        if not os.path.exists(path):
+            continue
         print(f"Loading {city_name} from cache...")
         try:
-            with open(cache_file, 'rb') as f:
-                G = pickle.load(f)
+            with open(path, 'rb') as f:
+                if path == cache_file:
+                    # Decompress while unpickling, without holding the whole stream in memory
+                    with zstd.ZstdDecompressor().stream_reader(f) as reader:
+                        G = pickle.load(reader)
+                else:
+                    # Unpickle straight from a read-only memory map of the file, so the
+                    # pickle stream is paged in by the OS instead of copied into a buffer
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        G = pickle.loads(mm)
             print(f"Loaded graph with {len(G.nodes)} nodes and {len(G.edges)} edges")
+            _attach_soa(G, soa_dir)
             return G
         except Exception as e:
             print(f"Error loading cache: {e}")
     
     # Download if not cached
+    G = _download_and_prepare(city_name)
+    _write_cache(G, cache_file, soa_dir)
+    _attach_soa(G, soa_dir)
+    
+    return G
+
+def _cache_paths(city_name, cache_dir):
+    """
+    Get the cache file paths for a city
+    
+    Args:
+        city_name: Name of the city
+        cache_dir: Directory to store cached data
+        
+    Returns:
+        tuple: (cache_file, legacy_cache_file, soa_dir) - zstd-compressed pickle,
+        older uncompressed pickle, and directory of graph arrays
+    """
+    # Get a simplified city name for the cache file to avoid formatting issues
+    simple_city_name = city_name.split(',')[0].lower()
+    
+    cache_file = os.path.join(cache_dir, f"{simple_city_name}_graph.pkl.zst")
+    legacy_cache_file = os.path.join(cache_dir, f"{simple_city_name}_graph.pkl")
+    soa_dir = os.path.join(cache_dir, f"{simple_city_name}_soa")
+    return cache_file, legacy_cache_file, soa_dir
+
+def _download_and_prepare(city_name):
+    """
+    Download a city's street network and add the attributes the search needs
+    
+    Args:
+        city_name: Name of the city
+        
+    Returns:
+        NetworkX graph with edge speeds and travel times
+    """
     print(f"Downloading {city_name} street network...")
     G = ox.graph_from_place(city_name, network_type='drive')
     G = ox.add_edge_speeds(G)
     G = ox.add_edge_travel_times(G)
+    intern_attribute_strings(G)
+    return G
+
+def _write_cache(G, cache_file, soa_dir):
+    """
+    Write a graph to the cache as a zstd-compressed pickle plus its arrays
     
-    # Save to cache
+    Args:
+        G: NetworkX graph
+        cache_file: Path of the compressed pickle
+        soa_dir: Directory for the graph arrays
+    """
     print(f"Saving network to cache...")
-    with open(cache_file, 'wb') as f:
-        pickle.dump(G, f)
+    compressor = zstd.ZstdCompressor(level=CACHE_COMPRESSION_LEVEL, threads=-1)
+    with open(cache_file, 'wb', buffering=CACHE_BUFFER_SIZE) as f, \
+            compressor.stream_writer(f) as writer:
+        pickle.dump(G, writer, protocol=pickle.HIGHEST_PROTOCOL)
+    save_graph_soa(G, soa_dir)
+
+def _warm_cache(city_name, cache_dir):
+    """Download and cache one city unless it is already cached (runs in a worker process)"""
+    cache_file, legacy_cache_file, soa_dir = _cache_paths(city_name, cache_dir)
+    if os.path.exists(cache_file) or os.path.exists(legacy_cache_file):
+        return
+    _write_cache(_download_and_prepare(city_name), cache_file, soa_dir)
+
+def warm_caches(city_names, cache_dir="data", max_workers=4):
+    """
+    Download and cache several cities in parallel
     
-    return G
+    Each city is fetched, prepared and written in its own process, so network
+    fetches, graph building and cache writes for different cities overlap.
+    Cities that are already cached are skipped, and a city that fails is
+    reported without stopping the others.
+    
+    Args:
+        city_names: Names of the cities to cache
+        cache_dir: Directory to store cached data
+        max_workers: Maximum number of worker processes
+        
+    Returns:
+        list: Names of the cities that could not be cached
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    failed = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_warm_cache, city_name, cache_dir): city_name
+                   for city_name in city_names}
+        for future in as_completed(futures):
+            city_name = futures[future]
+            try:
+                future.result()
+                print(f"Cached {city_name}")
+            except Exception as e:
+                print(f"Error caching {city_name}: {e}")
+                failed.append(city_name)
+    return failed
+
+def graph_to_soa(G, weight=SOA_WEIGHT):
+    """
+    Flatten a graph into Structure-of-Arrays form
+    
+    Nodes are numbered 0..N-1 in G.nodes() order and adjacency is stored in
+    CSR form: the neighbors of node i are nbr_idx[indptr[i]:indptr[i + 1]] and
+    the matching edge costs are edge_w[indptr[i]:indptr[i + 1]]. Parallel edges
+    are collapsed to the first one (key 0).
+    
+    Args:
+        G: NetworkX graph
+        weight: Edge attribute to use as edge cost
+        
+    Returns:
+        dict: node_ids, node_xy (x/y columns), indptr, nbr_idx and edge_w arrays
+    """
+    n = len(G)
+    node_ids = np.fromiter(G.nodes(), dtype=np.int64, count=n)
+    idx_of = {node: i for i, node in enumerate(G.nodes())}
+    node_xy = np.empty((n, 2), dtype=np.float64)
+    for i, (_, data) in enumerate(G.nodes(data=True)):
+        node_xy[i] = data['x'], data['y']
+    
+    # G.adjacency() yields the underlying neighbor dicts in G.nodes() order without
+    # building a view object per node like G.adj[node] or G.neighbors(node) do
+    adjacency = list(G.adjacency())
+    
+    # Row offsets from the out-degrees, then fill preallocated arrays by CSR edge index
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.fromiter((len(nbrs) for _, nbrs in adjacency), dtype=np.int64, count=n),
+              out=indptr[1:])
+    nbr_idx = np.empty(indptr[-1], dtype=np.int64)
+    edge_w = np.empty(indptr[-1], dtype=np.float64)
+    
+    # OSMnx graphs carry the weight on every edge once travel times are added, so index
+    # it directly and only redo the pass with a 1.0 default for graphs where it is missing
+    try:
+        k = 0
+        for _, nbrs in adjacency:
+            for neighbor, edges in nbrs.items():
+                nbr_idx[k] = idx_of[neighbor]
+                edge_w[k] = edges[0][weight]
+                k += 1
+    except KeyError:
+        k = 0
+        for _, nbrs in adjacency:
+            for neighbor, edges in nbrs.items():
+                nbr_idx[k] = idx_of[neighbor]
+                edge_w[k] = edges[0].get(weight, 1.0)
+                k += 1
+    
+    return {'node_ids': node_ids, 'node_xy': node_xy, 'indptr': indptr,
+            'nbr_idx': nbr_idx, 'edge_w': edge_w}
+
+def save_graph_soa(G, path, weight=SOA_WEIGHT):
+    """
+    Save a graph's Structure-of-Arrays form as .npy files plus a small JSON of metadata
+    
+    Args:
+        G: NetworkX graph
+        path: Directory to write the arrays to
+        weight: Edge attribute to use as edge cost
+    """
+    os.makedirs(path, exist_ok=True)
+    arrays = graph_to_soa(G, weight)
+    for name in SOA_ARRAYS:
+        np.save(os.path.join(path, f"{name}.npy"), arrays[name])
+    with open(os.path.join(path, "meta.json"), 'w') as f:
+        json.dump({'weight': weight, 'nodes': len(G)}, f)
+
+def load_graph_soa(path):
+    """
+    Load a graph's Structure-of-Arrays form saved by save_graph_soa
+    
+    The arrays are read-only memory maps of the .npy files, so nothing is read
+    until the arrays are used.
+    
+    Args:
+        path: Directory the arrays were saved to
+        
+    Returns:
+        tuple: (meta, arrays) - metadata dict and dict of arrays by name
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {
+        name: np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+        for name in SOA_ARRAYS
+    }
+    return meta, arrays
+
+def _attach_soa(G, path):
+    """
+    Attach a graph's saved arrays to G.graph['_soa_arrays'], saving them first if missing
+    
+    Args:
+        G: NetworkX graph
+        path: Directory the arrays are saved in
+    """
+    try:
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            save_graph_soa(G, path)
+        meta, arrays = load_graph_soa(path)
+    except Exception as e:
+        print(f"Error loading graph arrays: {e}")
+        return
+    
+    # Ignore arrays left over from a different download of the graph: the node IDs
+    # (in order) and every node's neighbor count must match
+    n = len(G)
+    if meta['nodes'] != n or not np.array_equal(
+            arrays['node_ids'], np.fromiter(G.nodes(), dtype=np.int64, count=n)):
+        return
+    degrees = np.fromiter((len(nbrs) for _, nbrs in G.adjacency()), dtype=np.int64, count=n)
+    if np.array_equal(np.diff(arrays['indptr']), degrees):
+        G.graph.setdefault('_soa_arrays', {})[meta['weight']] = arrays
+
+def _intern_value(value):
+    """Intern a short string, or the short strings in a list"""
+    if isinstance(value, str):
+        return sys.intern(value) if len(value) < INTERN_MAX_LENGTH else value
+    if isinstance(value, list):
+        return [_intern_value(v) for v in value]
+    return value
+
+def intern_attribute_strings(G):
+    """
+    Intern the string attributes of all nodes and edges in place
+    
+    OSMnx attributes repeat the same few strings (highway types, speeds, street
+    names) across thousands of edges. Interning makes every repeat share one
+    object, which shrinks the graph in memory and lets pickle write each string once.
+    
+    Args:
+        G: NetworkX graph
+    """
+    for _, data in G.nodes(data=True):
+        for key, value in data.items():
+            data[key] = _intern_value(value)
+    for _, _, data in G.edges(data=True):
+        for key, value in data.items():
+            data[key] = _intern_value(value)
+
+def get_graph_soa(G, weight=SOA_WEIGHT):
+    """
+    Get a graph's Structure-of-Arrays form for one weight, built once and cached on the graph
+    
+    Uses the arrays persisted with the graph cache when get_city_graph loaded them.
+    
+    Args:
+        G: NetworkX graph
+        weight: Edge attribute to use as edge cost
+        
+    Returns:
+        dict: Arrays as returned by graph_to_soa
+    """
+    soa_arrays = G.graph.setdefault('_soa_arrays', {})
+    if weight not in soa_arrays:
+        soa_arrays[weight] = graph_to_soa(G, weight)
+    return soa_arrays[weight]
+
+def get_node_coordinates(G):
+    """
+    Get node IDs and coordinates as arrays, shared with the graph's Structure-of-Arrays form
+    
+    Args:
+        G: NetworkX graph
+        
+    Returns:
+        tuple: (node_ids, node_xy) arrays in G.nodes() order, node_xy holding x/y columns
+    """
+    # Coordinates don't depend on the edge weight, so any arrays already built will do
+    soa_arrays = G.graph.get('_soa_arrays')
+    soa = next(iter(soa_arrays.values())) if soa_arrays else get_graph_soa(G)
+    return soa['node_ids'], soa['node_xy']
+
+def get_graph_gdfs(G):
+    """
+    Get the node and edge GeoDataFrames of a graph, built once and cached on the graph
+    
+    Args:
+        G: NetworkX graph
+        
+    Returns:
+        tuple: (nodes, edges) GeoDataFrames as returned by ox.graph_to_gdfs
+    """
+    if '_gdfs' not in G.graph:
+        G.graph['_gdfs'] = ox.graph_to_gdfs(G)
+    return G.graph['_gdfs']
+
+def get_condensation(G):
+    """
+    Get the condensation of a directed graph, computed once and cached on the graph
+    
+    Every strongly connected component is contracted to a single node, which
+    leaves a DAG that is much smaller than the street network itself.
+    
+    Args:
+        G: Directed NetworkX graph
+        
+    Returns:
+        nx.DiGraph: Condensation, with graph['mapping'] giving node ID -> component
+    """
+    if '_condensation' not in G.graph:
+        G.graph['_condensation'] = nx.condensation(G)
+    return G.graph['_condensation']
+
+def get_component_labels(G):
+    """
+    Get the connected component of every node, computed once and cached on the graph
+    
+    Directed graphs are split into strongly connected components, so nodes with
+    the same label can always reach each other.
+    
+    Args:
+        G: NetworkX graph
+        
+    Returns:
+        dict: Node ID -> component label
+    """
+    if G.is_directed():
+        return get_condensation(G).graph['mapping']
+    if '_cc_labels' not in G.graph:
+        G.graph['_cc_labels'] = {node: label for label, nodes in enumerate(nx.connected_components(G)) for node in nodes}
+    return G.graph['_cc_labels']
+
+def path_exists(G, start_node, end_node):
+    """
+    Check whether the destination can be reached from the start node
+    
+    Nodes in the same component are always connected. Otherwise the (cached)
+    condensation of a directed graph is searched, which is cheap compared to
+    searching the graph itself.
+    
+    Args:
+        G: NetworkX graph
+        start_node: Starting node ID
+        end_node: Destination node ID
+        
+    Returns:
+        bool: True if there is a path from start_node to end_node
+    """
+    labels = get_component_labels(G)
+    if labels[start_node] == labels[end_node]:
+        return True
+    if not G.is_directed():
+        return False
+    return nx.has_path(get_condensation(G), labels[start_node], labels[end_node])
 
 def get_diverse_nodes(G, distance_factor=0.015):
     """
@@ -65,31 +426,24 @@ def get_diverse_nodes(G, distance_factor=0.015):
     Returns:
         tuple: (start_node, end_node) suggested nodes for path calculation
     """
-    all_nodes = list(G.nodes())
+    node_ids, node_xy = get_node_coordinates(G)
+    xs, ys = node_xy[:, 0], node_xy[:, 1]
     
     # Try to pick nodes that are reasonably far apart
     # Get centroid of graph
-    center_y = np.mean([data['y'] for _, data in G.nodes(data=True)])
-    center_x = np.mean([data['x'] for _, data in G.nodes(data=True)])
-    
-    # Find a node in northwest part
-    northwest_nodes = []
-    for node, data in G.nodes(data=True):
-        if data['y'] > center_y + distance_factor and data['x'] < center_x - distance_factor:
-            northwest_nodes.append(node)
-    
-    # Find a node in southeast part
-    southeast_nodes = []
-    for node, data in G.nodes(data=True):
-        if data['y'] < center_y - distance_factor and data['x'] > center_x + distance_factor:
-            southeast_nodes.append(node)
-    
-    if northwest_nodes and southeast_nodes:
-        start_node = northwest_nodes[len(northwest_nodes)//3]  
-        end_node = southeast_nodes[len(southeast_nodes)//3]  
+    center_y = ys.mean()
+    center_x = xs.mean()
+    
+    # Find nodes in the northwest and southeast parts
+    northwest_nodes = np.flatnonzero((ys > center_y + distance_factor) & (xs < center_x - distance_factor))
+    southeast_nodes = np.flatnonzero((ys < center_y - distance_factor) & (xs > center_x + distance_factor))
+    
+    if len(northwest_nodes) and len(southeast_nodes):
+        start_node = node_ids[northwest_nodes[len(northwest_nodes)//3]]
+        end_node = node_ids[southeast_nodes[len(southeast_nodes)//3]]
     else:
         # Fallback if we couldn't find good nodes
-        start_node = all_nodes[len(all_nodes)//4]
-        end_node = all_nodes[3*len(all_nodes)//4]
+        start_node = node_ids[len(node_ids)//4]
+        end_node = node_ids[3*len(node_ids)//4]
     
-    return start_node, end_node 
\ No newline at end of file
+    return start_node.item(), end_node.item()
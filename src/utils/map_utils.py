@@ -16,6 +16,30 @@ def create_google_maps_url(lat1, lon1, lat2, lon2):
     """
     return f"https://www.google.com/maps/dir/{lat1},{lon1}/{lat2},{lon2}"
 
+def get_route_info(G, start_node, end_node):
+    """
+    Get the endpoint coordinates and Google Maps URL of a route, cached on the graph
+    
+    Args:
+        G: NetworkX graph
+        start_node: Starting node ID
+        end_node: Destination node ID
+        
+    Returns:
+        tuple: ((start_lat, start_lon, end_lat, end_lon), google_maps_url)
+    """
+    # Keyed by node pair in a dict on the graph, so the cache lives and dies with G
+    route_info = G.graph.setdefault('_route_info', {})
+    key = (start_node, end_node)
+    if key not in route_info:
+        start_lat = G.nodes[start_node]['y']
+        start_lon = G.nodes[start_node]['x']
+        end_lat = G.nodes[end_node]['y']
+        end_lon = G.nodes[end_node]['x']
+        coords = (start_lat, start_lon, end_lat, end_lon)
+        route_info[key] = (coords, create_google_maps_url(*coords))
+    return route_info[key]
+
 def print_route_info(start_node, end_node, G, city_name, output_dir):
     """
     Print and save route information for Google Maps comparison
@@ -30,14 +54,9 @@ def print_route_info(start_node, end_node, G, city_name, output_dir):
     Returns:
         tuple: (start_lat, start_lon, end_lat, end_lon)
     """
-    # Get start and end coordinates
-    start_lat = G.nodes[start_node]['y']
-    start_lon = G.nodes[start_node]['x']
-    end_lat = G.nodes[end_node]['y']
-    end_lon = G.nodes[end_node]['x']
-    
-    # Create Google Maps URL
-    google_maps_url = create_google_maps_url(start_lat, start_lon, end_lat, end_lon)
+    # Get start and end coordinates and the Google Maps URL
+    coords, google_maps_url = get_route_info(G, start_node, end_node)
+    start_lat, start_lon, end_lat, end_lon = coords
     
     # Print coordinates for Google Maps comparison
     print("\n===== ROUTE INFORMATION FOR GOOGLE MAPS COMPARISON =====")
@@ -59,7 +78,7 @@ def print_route_info(start_node, end_node, G, city_name, output_dir):
         f.write(f"End Location: {end_lat:.6f}, {end_lon:.6f}\n")
         f.write(f"Google Maps URL: {google_maps_url}\n")
     
-    return coords_file, (start_lat, start_lon, end_lat, end_lon)
+    return coords_file, coords
 
 def save_path_stats(coords_file, path, G):
     """
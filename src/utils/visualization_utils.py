@@ -5,6 +5,7 @@ Contains helper functions for map visualization components.
 """
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.collections import LineCollection
 
 
 def setup_map_figure(title, figsize=(12, 10)):
@@ -26,7 +27,8 @@ def setup_map_figure(title, figsize=(12, 10)):
     return fig, ax
 
 
-def draw_nodes(ax, nodes, node_ids, size=20, color='red', alpha=0.7, zorder=2, colormap=None):
+def draw_nodes(ax, nodes, node_ids, size=20, color='red', alpha=0.7, zorder=2, colormap=None,
+               node_xy=None):
     """
     Draw nodes on the map
     
@@ -39,34 +41,66 @@ def draw_nodes(ax, nodes, node_ids, size=20, color='red', alpha=0.7, zorder=2, c
         alpha: Transparency
         zorder: Z-order for drawing
         colormap: Optional matplotlib colormap for coloring by index
+        node_xy: Optional (N, 2) array of the nodes' coordinates, skips the lookup in nodes
         
     Returns:
-        List of scatter artists created
+        Scatter artist created, or None if there are no nodes to draw
     """
-    scatters = []
+    if len(node_ids) == 0:
+        return None
+        
+    # Draw every node with a single scatter call
+    pts = node_xy if node_xy is not None else nodes.loc[node_ids, ['x', 'y']].to_numpy()
     
     if colormap:
-        # Draw with color gradient
-        for i, node_id in enumerate(node_ids):
-            node = nodes.loc[node_id]
-            color_idx = min(i / max(1, len(node_ids)), 1.0)
-            scatter = ax.scatter(
-                node.x, node.y, 
-                color=colormap(color_idx), 
-                s=size, alpha=alpha, zorder=zorder
-            )
-            scatters.append(scatter)
+        # Color gradient by position in the list (i / n is always below 1, so no clamp)
+        inv = 1.0 / len(pts)
+        colors = colormap(np.arange(len(pts)) * inv)
     else:
-        # Draw all with same color
-        for node_id in node_ids:
-            node = nodes.loc[node_id]
-            scatter = ax.scatter(
-                node.x, node.y, 
-                color=color, s=size, alpha=alpha, zorder=zorder
-            )
-            scatters.append(scatter)
-            
-    return scatters
+        colors = color
+        
+    return ax.scatter(
+        pts[:, 0], pts[:, 1],
+        color=colors, s=size, alpha=alpha, zorder=zorder
+    )
+
+
+def get_edge_geometries(G):
+    """
+    Get the drawable geometry of every edge, extracted once and cached on the graph
+    
+    Args:
+        G: NetworkX graph
+        
+    Returns:
+        dict: (u, v) -> array of shape (k, 2) with the edge's x/y coordinates
+    """
+    if '_edge_geom' not in G.graph:
+        edge_geom = {}
+        for u, v, key, data in G.edges(keys=True, data=True):
+            if key == 0 and 'geometry' in data:
+                edge_geom[(u, v)] = np.column_stack(data['geometry'].xy)
+            elif key == 0 or (u, v) not in edge_geom:
+                # No geometry, use a straight line
+                u_data, v_data = G.nodes[u], G.nodes[v]
+                edge_geom[(u, v)] = np.array([[u_data['x'], u_data['y']], [v_data['x'], v_data['y']]])
+        G.graph['_edge_geom'] = edge_geom
+    return G.graph['_edge_geom']
+
+
+def edge_path_segments(G, path):
+    """
+    Get the line segments for the edges along a path
+    
+    Args:
+        G: NetworkX graph
+        path: List of node IDs forming the path
+        
+    Returns:
+        list: (k, 2) coordinate arrays, one per edge of the path found in the graph
+    """
+    edge_geom = get_edge_geometries(G)
+    return [edge_geom[edge] for edge in zip(path[:-1], path[1:]) if edge in edge_geom]
 
 
 def draw_edge_path(ax, G, nodes, path, color='blue', width=2, alpha=0.7, zorder=3):
@@ -84,47 +118,36 @@ def draw_edge_path(ax, G, nodes, path, color='blue', width=2, alpha=0.7, zorder=
         zorder: Z-order for drawing
         
     Returns:
-        List of line artists created
+        Line collection created, or None if the path has no edges
     """
-    lines = []
-    
     if len(path) < 2:
-        return lines
+        return None
         
-    for i in range(len(path) - 1):
-        u, v = path[i], path[i + 1]
-        if G.has_edge(u, v):
-            try:
-                edge_data = G.get_edge_data(u, v)[0]
-                if 'geometry' in edge_data:
-                    xs, ys = edge_data['geometry'].xy
-                    line = ax.plot(xs, ys, color=color, linewidth=width, zorder=zorder, alpha=alpha)[0]
-                else:
-                    # No geometry, plot straight line
-                    u_node = nodes.loc[u]
-                    v_node = nodes.loc[v]
-                    line = ax.plot([u_node.x, v_node.x], [u_node.y, v_node.y], 
-                                  color=color, linewidth=width, zorder=zorder, alpha=alpha)[0]
-            except Exception:
-                # Fall back to straight line
-                u_node = nodes.loc[u]
-                v_node = nodes.loc[v]
-                line = ax.plot([u_node.x, v_node.x], [u_node.y, v_node.y], 
-                              color=color, linewidth=width, zorder=zorder, alpha=alpha)[0]
-            
-            lines.append(line)
-    
+    segments = edge_path_segments(G, path)
+    if not segments:
+        return None
+        
+    # Draw the whole path as a single collection
+    lines = LineCollection(segments, colors=color, linewidths=width, alpha=alpha, zorder=zorder)
+    ax.add_collection(lines)
     return lines
 
 
 def clear_artists(artists):
     """
-    Clear a list of matplotlib artists from their axes
+    Clear matplotlib artists from their axes
     
     Args:
-        artists: List of matplotlib artists to remove
+        artists: Artist or list of matplotlib artists to remove (None entries are skipped)
     """
+    if artists is None:
+        return
+    if not isinstance(artists, (list, tuple)):
+        artists = [artists]
+        
     for artist in artists:
+        if artist is None:
+            continue
         if artist in artist.axes.collections:
             artist.remove()
         elif artist in artist.axes.lines:
@@ -2,7 +2,10 @@
 GIF recording functionality for algorithm visualizations
 """
 import os
+import tempfile
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.animation import FuncAnimation
@@ -13,25 +16,47 @@ class VisualizationRecorder:
     Recorder for creating GIFs from algorithm visualization
     """
     
-    def __init__(self, output_dir="output"):
+    def __init__(self, output_dir="output", dpi=72):
         """
         Initialize the recorder
         
         Args:
             output_dir: Directory to save GIFs
+            dpi: Resolution of the GIF frames (frames are downscaled from the figure's dpi)
         """
         self.output_dir = output_dir
+        self.dpi = dpi
         os.makedirs(output_dir, exist_ok=True)
         
-        # List to store frames
-        self.frames = []
+        # Frames are stored as palette indices, appended to a temporary file as they
+        # are captured and mapped back as one (N, H, W) array when the GIF is saved.
+        # Each frame's palette is kept in memory in a matching (N, 768) array and the
+        # number of consecutive captures it stands for in an (N,) array
+        self.frames = None
+        self.frame_size = None
+        self.palettes = None
+        self.repeats = None
+        self.frame_count = 0
+        self._frame_file = None
+        self._last_buffer = None
         self.recording = False
         self.last_capture_time = 0
         self.capture_interval = 0.1  # seconds between frames
         
+        # Frames are downscaled and quantized on worker threads, which only exist while
+        # recording; [future, repeats] entries are kept in capture order and stored as
+        # they complete
+        self.max_workers = min(4, os.cpu_count() or 1)
+        self._executor = None
+        self._pending = deque()
+        
     def start_recording(self):
         """Start recording frames"""
-        self.frames = []
+        self._clear_frames()
+        self._pending.clear()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._frame_file = tempfile.TemporaryFile(dir=self.output_dir, suffix='.frames')
         self.recording = True
         self.last_capture_time = 0
         print("GIF recording started")
@@ -39,7 +64,11 @@ class VisualizationRecorder:
     def stop_recording(self):
         """Stop recording frames"""
         self.recording = False
-        print(f"GIF recording stopped with {len(self.frames)} frames")
+        self._store_pending(wait=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        print(f"GIF recording stopped with {self.frame_count} frames")
         
     def capture_frame(self, fig):
         """
@@ -52,24 +81,145 @@ class VisualizationRecorder:
             return
             
         # Only capture frames at regular intervals to keep the GIF a reasonable size
-        current_time = time.time()
+        current_time = time.monotonic()
         if current_time - self.last_capture_time < self.capture_interval:
             return
             
         self.last_capture_time = current_time
         
-        # Use the most reliable method - save to temp file and load
-        # This works with all backends
+        # Render straight into the canvas buffer and copy the pixels from memory; the
+        # copy is handed to a worker thread so only the draw stays on the GUI thread
         try:
-            temp_file = os.path.join(self.output_dir, "_temp_frame.png")
-            fig.savefig(temp_file, dpi=fig.dpi, format='png', bbox_inches='tight')
-            image = Image.open(temp_file)
-            self.frames.append(image.copy())
-            # Clean up the temporary file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+            # The caller has usually just drawn the figure, so only redraw if stale
+            if fig.stale:
+                fig.canvas.draw()
+            buf = np.asarray(fig.canvas.buffer_rgba())
+            
+            # Don't store frames identical to the last one captured, show that one longer instead
+            if self._last_buffer is not None and np.array_equal(buf, self._last_buffer):
+                if self._pending:
+                    self._pending[-1][1] += 1
+                elif self.frame_count:
+                    self.repeats[self.frame_count - 1] += 1
+                return
+            self._last_buffer = buf.copy()
+            
+            scale = self.dpi / fig.dpi if self.dpi and self.dpi < fig.dpi else 1.0
+            self._pending.append([self._executor.submit(self._quantize_frame, self._last_buffer, scale), 1])
+            self._store_pending()
         except Exception as e:
             print(f"Warning: Unable to capture frame: {e}")
+            
+    @staticmethod
+    def _quantize_frame(buf, scale):
+        """
+        Downscale a captured RGBA buffer and quantize it to a palette image
+        
+        Quantizing now keeps each stored frame at one byte per pixel. Fast octree
+        is used because median cut is far too slow to run per frame.
+        
+        Args:
+            buf: (H, W, 4) uint8 RGBA pixels
+            scale: Factor to resize the frame by
+            
+        Returns:
+            PIL image in 'P' mode
+        """
+        image = Image.fromarray(buf[:, :, :3])
+        if scale < 1.0:
+            image = image.resize(
+                (round(image.width * scale), round(image.height * scale)), Image.BOX
+            )
+        return image.quantize(colors=256, method=Image.FASTOCTREE)
+        
+    def _store_pending(self, wait=False):
+        """
+        Store the quantized frames that are ready, in capture order
+        
+        Args:
+            wait: Whether to wait for all outstanding frames
+        """
+        while self._pending and (wait or self._pending[0][0].done()):
+            future, repeats = self._pending.popleft()
+            try:
+                self._store_frame(future.result(), repeats)
+            except Exception as e:
+                print(f"Warning: Unable to capture frame: {e}")
+            
+    def _store_frame(self, image, repeats=1):
+        """
+        Append a palette image to the frame file, growing the palette arrays when full
+        
+        Args:
+            image: PIL image in 'P' mode
+            repeats: Number of consecutive identical captures the frame stands for
+        """
+        if self.frame_size is None:
+            self.frame_size = image.size
+            self.palettes = np.zeros((64, 768), dtype=np.uint8)
+            self.repeats = np.zeros(64, dtype=np.int64)
+        elif self.frame_count == len(self.palettes):
+            # Double the capacity
+            self.palettes = np.concatenate([self.palettes, np.zeros_like(self.palettes)])
+            self.repeats = np.concatenate([self.repeats, np.zeros_like(self.repeats)])
+            
+        # Keep every frame the size of the first one (the window may be resized)
+        if image.size != self.frame_size:
+            image = image.resize(self.frame_size)
+            
+        palette = image.getpalette()
+        self._frame_file.write(image.tobytes())
+        self.palettes[self.frame_count, :len(palette)] = palette
+        self.repeats[self.frame_count] = repeats
+        self.frame_count += 1
+        
+    def _frame_rgb(self, i):
+        """
+        Expand a stored frame back to RGB pixels
+        
+        Args:
+            i: Frame index
+            
+        Returns:
+            np.ndarray: (H, W, 3) uint8 array
+        """
+        return self.palettes[i].reshape(256, 3)[self.frames[i]]
+        
+    def _shared_palette(self):
+        """
+        Build one palette for the whole GIF from the first, middle and last frames
+        
+        Returns:
+            np.ndarray: (256, 3) uint8 palette
+        """
+        samples = sorted({0, self.frame_count // 2, self.frame_count - 1})
+        sample = np.concatenate([self._frame_rgb(i) for i in samples])
+        image = Image.fromarray(sample).convert('P', palette=Image.ADAPTIVE)
+        palette = np.zeros(768, dtype=np.uint8)
+        colors = image.getpalette()
+        palette[:len(colors)] = colors
+        return palette.reshape(256, 3)
+        
+    def _frame_image(self, i, palette):
+        """
+        Build the PIL image for a stored frame, remapped onto a shared palette
+        
+        Args:
+            i: Frame index
+            palette: (256, 3) shared palette
+            
+        Returns:
+            PIL image in 'P' mode
+        """
+        # Map each of the frame's own colors to its nearest shared color, then
+        # remap the pixels with a table lookup instead of quantizing them again
+        own = self.palettes[i].reshape(256, 3).astype(np.int32)
+        dist = ((own[:, None, :] - palette[None, :, :].astype(np.int32)) ** 2).sum(axis=2)
+        lut = dist.argmin(axis=1).astype(np.uint8)
+        
+        image = Image.fromarray(lut[self.frames[i]])
+        image.putpalette(palette.tobytes())
+        return image
         
     def save_gif(self, filename, fps=10):
         """
@@ -82,7 +232,8 @@ class VisualizationRecorder:
         Returns:
             str: Path to the created GIF file or None if no frames
         """
-        if not self.frames:
+        self._store_pending(wait=True)
+        if not self.frame_count:
             print("No frames to save")
             return None
             
@@ -95,21 +246,44 @@ class VisualizationRecorder:
             
         filepath = os.path.join(self.output_dir, filename)
         
-        # Create the GIF
-        duration = 1000 // fps  # Duration of each frame in milliseconds
+        # Duration of each frame in milliseconds, a frame standing in for identical
+        # captures lasting as long as all of them
+        duration = (self.repeats[:self.frame_count] * (1000 // fps)).tolist()
+        
+        # Map the frame file back in; pages are read as frames are encoded
+        self._frame_file.flush()
+        width, height = self.frame_size
+        self.frames = np.memmap(self._frame_file, dtype=np.uint8, mode='r',
+                                shape=(self.frame_count, height, width))
         
-        # Save the frames as a GIF
-        self.frames[0].save(
+        # Save the frames as a GIF, converting them to PIL images only as they are written.
+        # All frames share one palette, so the encoder does not need a color table per frame
+        palette = self._shared_palette()
+        self._frame_image(0, palette).save(
             filepath,
             format='GIF',
-            append_images=self.frames[1:],
+            append_images=(self._frame_image(i, palette) for i in range(1, self.frame_count)),
             save_all=True,
             duration=duration,
             loop=0,  # Loop forever
             optimize=False
         )
         
-        print(f"Saved GIF with {len(self.frames)} frames to {filepath}")
-        self.frames = []  # Clear frames after saving
+        print(f"Saved GIF with {self.frame_count} frames to {filepath}")
+        
+        # Clear frames after saving
+        self._clear_frames()
+        
+        return filepath
         
-        return filepath 
\ No newline at end of file
+    def _clear_frames(self):
+        """Drop all recorded frames and delete the frame file"""
+        self.frames = None
+        self.frame_size = None
+        self.palettes = None
+        self.repeats = None
+        self.frame_count = 0
+        self._last_buffer = None
+        if self._frame_file is not None:
+            self._frame_file.close()
+            self._frame_file = None 
\ No newline at end of file
@@ -4,9 +4,12 @@ Map rendering component
 This module provides classes for rendering maps and visualizations
 """
 import matplotlib.pyplot as plt
-import osmnx as ox
+import numpy as np
+from matplotlib.collections import LineCollection
+from src.data.graph import get_graph_gdfs, get_node_coordinates
 from src.utils.visualization_utils import (
-    setup_map_figure, draw_nodes, draw_edge_path, clear_collections_and_lines
+    setup_map_figure, draw_nodes, draw_edge_path, clear_collections_and_lines,
+    get_edge_geometries, edge_path_segments
 )
 
 class MapRenderer:
@@ -24,7 +27,57 @@ class MapRenderer:
         self.figsize = figsize
         self.fig = None
         self.ax = None
-        self.nodes, self.edges = ox.graph_to_gdfs(G)
+        
+        # Cached image of the static base map for blitting, and the view it was taken at
+        self._background = None
+        self._background_view = None
+        
+        self.nodes, self.edges = get_graph_gdfs(G)
+        
+        # Node coordinates in G.nodes() order, shared with the graph's SoA arrays, with
+        # the node IDs sorted once so whole arrays of IDs can be mapped to rows with a
+        # binary search
+        self._node_ids, self._xy = get_node_coordinates(G)
+        self._id_order = np.argsort(self._node_ids)
+        self._sorted_ids = self._node_ids[self._id_order]
+        
+        # Extract edge geometries now rather than on the first path drawn mid-search
+        get_edge_geometries(G)
+        
+    def node_index(self, node_ids):
+        """
+        Map node IDs to their rows in the coordinate array
+        
+        Args:
+            node_ids: Array, list or set of node IDs
+            
+        Returns:
+            np.ndarray: Row index of each node
+            
+        Raises:
+            KeyError: If a node ID is not in the graph
+        """
+        if not isinstance(node_ids, np.ndarray):
+            node_ids = np.fromiter(node_ids, dtype=np.int64, count=len(node_ids))
+        pos = np.minimum(np.searchsorted(self._sorted_ids, node_ids), len(self._sorted_ids) - 1)
+        
+        # searchsorted only gives the insertion point, so check the IDs were actually found
+        missing = self._sorted_ids[pos] != node_ids
+        if missing.any():
+            raise KeyError(node_ids[missing][0].item())
+        return self._id_order[pos]
+        
+    def node_coordinates(self, node_ids):
+        """
+        Look up the coordinates of nodes
+        
+        Args:
+            node_ids: Array, list or set of node IDs
+            
+        Returns:
+            np.ndarray: (N, 2) array of x/y coordinates
+        """
+        return self._xy[self.node_index(node_ids)]
         
     def setup(self, title):
         """
@@ -46,7 +99,8 @@ class MapRenderer:
         Returns:
             self for method chaining
         """
-        self.edges.plot(ax=self.ax, linewidth=0.5, color='gray', alpha=0.5)
+        # Rasterize the street network so vector outputs don't carry every edge
+        self.edges.plot(ax=self.ax, linewidth=0.5, color='gray', alpha=0.5, rasterized=True)
         return self
         
     def clear(self, keep_base=True):
@@ -78,6 +132,9 @@ class MapRenderer:
             self for method chaining
         """
         plt.ion()
+        # Artists left animated by blit() would be skipped by a full draw
+        for artist in self._dynamic_artists():
+            artist.set_animated(False)
         self.fig.canvas.draw()
         
         if block:
@@ -88,6 +145,56 @@ class MapRenderer:
             
         return self
         
+    def _dynamic_artists(self):
+        """
+        Get every artist drawn over the base map, including the title and legend
+        
+        Returns:
+            list: Artists other than the base street network
+        """
+        dynamic = self.ax.collections[1:] + self.ax.lines + [self.ax.title]
+        if self.ax.get_legend():
+            dynamic.append(self.ax.get_legend())
+        return dynamic
+        
+    def blit(self):
+        """
+        Refresh the display by redrawing only the changing artists
+        
+        Everything but the base map (including the title and legend) is drawn
+        over a cached image of the base map, which is re-captured only when the
+        view or the window size changes. Falls back to show() if the backend
+        cannot blit.
+        
+        Returns:
+            self for method chaining
+        """
+        canvas = self.fig.canvas
+        if not canvas.supports_blit:
+            return self.show(block=False)
+            
+        dynamic = self._dynamic_artists()
+        for artist in dynamic:
+            artist.set_animated(True)
+            
+        view = (self.ax.get_xlim(), self.ax.get_ylim(), canvas.get_width_height())
+        if self._background is None or view != self._background_view:
+            # A full draw skips animated artists, leaving just the base map
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+            self._background_view = view
+        else:
+            canvas.restore_region(self._background)
+            
+        for artist in sorted(dynamic, key=lambda a: a.get_zorder()):
+            self.ax.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        
+        # The canvas is up to date, so a pending idle draw must not repaint it
+        self.fig.stale = False
+        return self
+        
     def save(self, filepath, dpi=300):
         """
         Save the figure to a file
@@ -111,6 +218,105 @@ class AStarMapRenderer(MapRenderer):
         super().__init__(G, figsize)
         self.colormap = plt.cm.plasma
         
+        # Persistent artists updated in place while the search runs
+        self._visited_artist = None
+        self._frontier_artist = None
+        self._current_artist = None
+        self._path_artist = None
+        self._final_path_artist = None
+        self._path_version = None
+        
+        # Rows of the visited nodes and a per-row visited mask, extended as the
+        # visited list grows
+        self._visited_source = None
+        self._visited_rows = np.empty(0, dtype=np.intp)
+        self._visited_mask = np.zeros(len(self._node_ids), dtype=np.bool_)
+        self._visited_count = 0
+        
+        # Visit order 0, 1, 2, ... as floats, the color values of the visited scatter
+        self._visit_order = np.empty(0)
+        
+    def init_search_artists(self):
+        """
+        Create the artists for the search overlays, to be updated in place by
+        update_search and set_final_path
+        
+        Returns:
+            self for method chaining
+        """
+        empty = np.empty((0, 2))
+        self._visited_artist = self.ax.scatter(
+            empty[:, 0], empty[:, 1], c=[], cmap=self.colormap, vmin=0.0, vmax=1.0,
+            s=20, alpha=0.7, zorder=2, label='Visited Nodes'
+        )
+        self._frontier_artist = self.ax.scatter(
+            empty[:, 0], empty[:, 1], color='cyan', s=20, alpha=0.5, zorder=1, label='Frontier'
+        )
+        self._current_artist = self.ax.scatter(
+            empty[:, 0], empty[:, 1], color='yellow', s=100, alpha=1.0, zorder=3
+        )
+        self._path_artist = LineCollection(
+            [], colors='blue', linewidths=2, alpha=0.7, zorder=3, label='Current Path'
+        )
+        self.ax.add_collection(self._path_artist)
+        self._final_path_artist = LineCollection(
+            [], colors='green', linewidths=3, alpha=1.0, zorder=5, label='Final Path'
+        )
+        self.ax.add_collection(self._final_path_artist)
+        return self
+        
+    def update_search(self, visited_nodes, open_set, current_node=None, path=None, path_version=None,
+                      frontier_changed=True):
+        """
+        Update the search overlays in place without creating new artists
+        
+        Args:
+            visited_nodes: List of visited node IDs, colored by visit order
+            open_set: Set of nodes in the frontier
+            current_node: Node being processed, or None
+            path: Current best path as a list of node IDs, or None
+            path_version: Optional version of the path; the path segments are only
+                rebuilt when it differs from the last one drawn
+            frontier_changed: Whether open_set changed since the last call; the
+                frontier offsets are left as they are if not
+            
+        Returns:
+            self for method chaining
+        """
+        visited_rows = self._sync_visited(visited_nodes)
+        n = len(visited_rows)
+        self._visited_artist.set_offsets(self._xy[visited_rows])
+        # Color by visit order, scaling the colormap to the count instead of
+        # rebuilding the i / n values every frame
+        if n > len(self._visit_order):
+            self._visit_order = np.arange(max(2 * len(self._visit_order), n), dtype=np.float64)
+        self._visited_artist.set_array(self._visit_order[:n])
+        self._visited_artist.set_clim(0.0, max(1, n))
+        
+        if frontier_changed:
+            self._frontier_artist.set_offsets(self._xy[self._frontier_rows(open_set)])
+        
+        current = [current_node] if current_node is not None else []
+        self._current_artist.set_offsets(self.node_coordinates(current).reshape(len(current), 2))
+        
+        if path_version is None or path_version != self._path_version:
+            self._path_artist.set_segments(edge_path_segments(self.G, path) if path else [])
+            self._path_version = path_version
+        return self
+        
+    def set_final_path(self, path):
+        """
+        Show the final path on its persistent artist
+        
+        Args:
+            path: List of node IDs forming the path, or None to hide it
+            
+        Returns:
+            self for method chaining
+        """
+        self._final_path_artist.set_segments(edge_path_segments(self.G, path) if path else [])
+        return self
+        
     def render_visited_nodes(self, visited_nodes):
         """
         Render visited nodes with color gradient
@@ -123,6 +329,7 @@ class AStarMapRenderer(MapRenderer):
         """
         draw_nodes(
             self.ax, self.nodes, visited_nodes,
+            node_xy=self._xy[self._sync_visited(visited_nodes)],
             size=20, alpha=0.7, zorder=2, colormap=self.colormap
         )
         return self
@@ -138,13 +345,61 @@ class AStarMapRenderer(MapRenderer):
         Returns:
             self for method chaining
         """
-        frontier_nodes = [n for n in open_set if n not in visited_nodes]
+        self._sync_visited(visited_nodes)
+        frontier_rows = self._frontier_rows(open_set)
         draw_nodes(
-            self.ax, self.nodes, frontier_nodes,
+            self.ax, self.nodes, self._node_ids[frontier_rows],
+            node_xy=self._xy[frontier_rows],
             size=20, color='cyan', alpha=0.5, zorder=1
         )
         return self
         
+    def _sync_visited(self, visited_nodes):
+        """
+        Bring the cached visited rows and mask up to date with the visited list
+        
+        The visited list only ever grows during a search, so only the nodes
+        appended since the last call are mapped to rows.
+        
+        Args:
+            visited_nodes: Array view or list of visited node IDs
+            
+        Returns:
+            np.ndarray: Rows of the visited nodes in visit order
+        """
+        # A fresh view of the visited buffer is passed each frame, so compare the buffer itself
+        source = visited_nodes
+        if isinstance(visited_nodes, np.ndarray) and visited_nodes.base is not None:
+            source = visited_nodes.base
+            
+        n = len(visited_nodes)
+        if source is not self._visited_source or n < self._visited_count:
+            self._visited_source = source
+            self._visited_mask[:] = False
+            self._visited_count = 0
+            
+        if n > self._visited_count:
+            new_rows = self.node_index(visited_nodes[self._visited_count:])
+            if n > len(self._visited_rows):
+                self._visited_rows = np.resize(self._visited_rows, max(2 * len(self._visited_rows), n))
+            self._visited_rows[self._visited_count:n] = new_rows
+            self._visited_mask[new_rows] = True
+            self._visited_count = n
+        return self._visited_rows[:n]
+        
+    def _frontier_rows(self, open_set):
+        """
+        Get the rows of the open set nodes that have not been visited
+        
+        Args:
+            open_set: Set of nodes in the frontier
+            
+        Returns:
+            np.ndarray: Rows of the frontier nodes
+        """
+        rows = self.node_index(open_set)
+        return rows[~self._visited_mask[rows]]
+        
     def render_current_node(self, node_id):
         """
         Highlight current node being processed
@@ -157,6 +412,7 @@ class AStarMapRenderer(MapRenderer):
         """
         draw_nodes(
             self.ax, self.nodes, [node_id],
+            node_xy=self.node_coordinates([node_id]),
             size=100, color='yellow', alpha=1.0, zorder=3
         )
         return self
@@ -172,15 +428,13 @@ class AStarMapRenderer(MapRenderer):
         Returns:
             self for method chaining
         """
-        if not nodes_of_interest or len(nodes_of_interest) == 0:
+        if nodes_of_interest is None or len(nodes_of_interest) == 0:
             return self
             
-        # Get coordinates for the nodes of interest
-        points = self.nodes.loc[nodes_of_interest]
-        
-        # Get bounds
-        min_x, min_y = points.x.min(), points.y.min()
-        max_x, max_y = points.x.max(), points.y.max()
+        # Get bounds of the nodes of interest
+        points = self.node_coordinates(nodes_of_interest)
+        min_x, min_y = points.min(axis=0)
+        max_x, max_y = points.max(axis=0)
         
         # Calculate the width and height of the bounding box
         width = max_x - min_x
@@ -209,12 +463,14 @@ class AStarMapRenderer(MapRenderer):
         """
         draw_nodes(
             self.ax, self.nodes, [start_node],
+            node_xy=self.node_coordinates([start_node]),
             size=150, color='green', alpha=1.0, zorder=4
-        )
+        ).set_label('Start')
         draw_nodes(
             self.ax, self.nodes, [end_node],
+            node_xy=self.node_coordinates([end_node]),
             size=150, color='red', alpha=1.0, zorder=4
-        )
+        ).set_label('End')
         
         # Zoom to the area containing start and end points
         # Use a larger buffer (40%) for initial view to account for exploration
@@ -269,11 +525,12 @@ class AStarMapRenderer(MapRenderer):
         if self.ax.get_legend():
             self.ax.get_legend().remove()
             
+        handles, labels = self.ax.get_legend_handles_labels()
+        by_label = dict(zip(labels, handles))
         if has_path:
-            self.ax.legend(['Visited Nodes', 'Final Path', 'Start', 'End'], loc='best')
+            names = [name for name in ('Visited Nodes', 'Final Path', 'Start', 'End') if name in by_label]
+            self.ax.legend([by_label[name] for name in names], names, loc='best')
         else:
-            handles, labels = self.ax.get_legend_handles_labels()
-            by_label = dict(zip(labels, handles))
             self.ax.legend(by_label.values(), by_label.keys(), loc='best')
             
         return self 
\ No newline at end of file
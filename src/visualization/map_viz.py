@@ -4,13 +4,52 @@ Map visualization functionality
 import os
 import time
 import matplotlib.pyplot as plt
+import numpy as np
 
+from src.data.graph import path_exists
 from src.utils.map_utils import print_route_info, save_path_stats
-from src.algorithms.astar import a_star_realtime, UpdateType
-from src.visualization.visualization_state import VisualizationState, AlgorithmRunner
+from src.algorithms.astar import prepare_search, run_search, UpdateType
+from src.visualization.visualization_state import (
+    VisualizationState, AlgorithmRunner, coalesce_updates
+)
 from src.visualization.map_renderer import AStarMapRenderer
 from src.visualization.gif_recorder import VisualizationRecorder
 
+def _display_frames(runner, vis_state, batches_per_update):
+    """
+    Drain algorithm updates into the visualization state, yielding once per display tick
+    
+    Ticks are spaced vis_state.update_interval apart while the search animates,
+    and each tick replays at most batches_per_update visited-node batches.
+    
+    Args:
+        runner: AlgorithmRunner producing updates
+        vis_state: VisualizationState to apply the updates to
+        batches_per_update: Maximum visited-node batches to replay per tick
+        
+    Yields:
+        VisualizationState: The updated state, once per display refresh
+    """
+    while runner.is_alive() or runner.has_updates():
+        tick_start = time.monotonic()
+        updates = runner.get_batch(vis_state.update_interval, max_visited=batches_per_update)
+        
+        # Apply the tick's updates merged, so snapshots superseded within the tick are skipped
+        for update_type, update_data in coalesce_updates(updates):
+            vis_state.update_from_algorithm(update_type, update_data)
+            
+        if updates:
+            yield vis_state
+            
+        # Spread the visited-node batches out over time while the search animates,
+        # keeping the GUI responsive for the rest of the tick
+        remaining = vis_state.update_interval - (time.monotonic() - tick_start)
+        if remaining > 0 and not vis_state.completed:
+            plt.pause(remaining)
+        elif plt.get_fignums():
+            # No pause this tick, so handle pending GUI events directly
+            plt.gcf().canvas.flush_events()
+
 def visualize_realtime_search(G, start_node, end_node, weight='travel_time', city_name="City", 
                          output_dir="output", save_result=True, heuristic_type=None,
                          custom_heuristic=None, record_gif=True):
@@ -46,114 +85,100 @@ def visualize_realtime_search(G, start_node, end_node, weight='travel_time', cit
     renderer.setup(f"A* Search in {display_city_name}")
     renderer.render_base_map()
     renderer.render_start_end(start_node, end_node)
+    renderer.init_search_artists()
     renderer.show(block=False)
     
+    # Don't animate a search that would only exhaust everything reachable from the start
+    if not path_exists(G, start_node, end_node):
+        print("No path exists between the start and end nodes")
+        renderer.update_title(f"A* Search in {display_city_name} - No path exists")
+        renderer.show(block=True)
+        return None, np.empty(0, dtype=np.int64)
+    
     # Initialize visualization state
     vis_state = VisualizationState()
     vis_state.update_interval = 0.1  # Update screen at most this many times per second
     
+    # The algorithm process runs at full speed, so pace the replay of its batches here
+    target_runtime_per_batch = 0.02  # seconds
+    batches_per_update = max(1, round(vis_state.update_interval / target_runtime_per_batch))
+    
     # Set up GIF recorder if requested
     recorder = None
     if record_gif:
         recorder = VisualizationRecorder(output_dir)
+        # Display ticks are already paced, so only throttle bursts shorter than a tick
+        recorder.capture_interval = vis_state.update_interval / 2
         recorder.start_recording()
     
-    # Set up the algorithm runner
-    algorithm_args = (G, start_node, end_node, weight, heuristic_type, custom_heuristic)
-    runner = AlgorithmRunner(a_star_realtime, algorithm_args)
+    # Set up the algorithm runner. Everything that needs the graph is prepared here,
+    # where its caches persist between searches, and only the resulting arrays are
+    # sent to the algorithm process
+    search = prepare_search(G, start_node, end_node, weight, heuristic_type, custom_heuristic)
+    runner = AlgorithmRunner(run_search, (search,))
     
     # Start the algorithm
     runner.start()
     
-    # Main visualization loop - process updates from the algorithm thread
+    # Main visualization loop - process updates from the algorithm process
     try:
-        while runner.is_alive() or runner.has_updates():
-            # Get next update if available
-            update = runner.get_update()
-            
-            if update is not None:
-                update_type, update_data = update
-                vis_state.update_from_algorithm(update_type, update_data)
-            
-            # Check if we should update the display
-            if update is not None and vis_state.should_update_display():
-                # Clear previous rendering but keep base map
-                renderer.clear(keep_base=True)
+        for vis_state in _display_frames(runner, vis_state, batches_per_update):
+            if vis_state.completed:
+                # Bring the persistent overlays up to the final state: all visited
+                # nodes, the last frontier and best path, and no current node
+                renderer.update_search(
+                    vis_state.visited_nodes, vis_state.current_open_set,
+                    None, vis_state.current_best_path, vis_state.path_version
+                )
                 
-                # Draw visited nodes with color gradient
-                renderer.render_visited_nodes(vis_state.visited_nodes)
-                
-                # Draw current frontier (open set)
-                renderer.render_frontier(vis_state.current_open_set, vis_state.visited_nodes)
-                
-                # Highlight current node if we have one
-                if not vis_state.completed and vis_state.visited_nodes:
-                    current_node = vis_state.visited_nodes[-1]
-                    renderer.render_current_node(current_node)
-                
-                # Always redraw start and end points
-                renderer.render_start_end(start_node, end_node)
-                
-                # Draw the current best path
-                if len(vis_state.current_best_path) > 1:
-                    renderer.render_path(vis_state.current_best_path, color='blue')
-                
-                # If completed, draw the final path
-                if vis_state.completed and vis_state.final_path:
-                    renderer.render_path(
-                        vis_state.final_path, 
-                        color='green', 
-                        width=3, 
-                        alpha=1.0, 
-                        zorder=5
-                    )
-                    
+                # Draw the final path
+                renderer.set_final_path(vis_state.final_path)
+                if vis_state.final_path:
                     # Zoom to the area containing the path with some buffer
                     # Include key points: start, end, and a sample of path nodes to keep it focused
-                    zoom_nodes = [start_node, end_node]
-                    
-                    # Add some path nodes for better framing
-                    if len(vis_state.final_path) > 2:
-                        # Add some points along the path to ensure we capture its extent
-                        path_len = len(vis_state.final_path)
-                        if path_len < 10:
-                            # For short paths, include all nodes
-                            zoom_nodes.extend(vis_state.final_path)
-                        else:
-                            # For longer paths, sample some nodes
-                            sample_indices = [path_len // 4, path_len // 2, 3 * path_len // 4]
-                            zoom_nodes.extend([vis_state.final_path[i] for i in sample_indices])
+                    path = np.asarray(vis_state.final_path, dtype=np.int64)
+                    if len(path) >= 10:
+                        # For longer paths, sample the quarter points; short paths are used whole
+                        path = path[np.array([1, 2, 3]) * len(path) // 4]
+                    zoom_nodes = np.concatenate([[start_node, end_node], path])
                     
                     # Use a larger buffer (35%) to ensure we have adequate overhead for exploration
                     renderer.zoom_to_area_of_interest(zoom_nodes, buffer_factor=0.35)
-                
-                # Update the title
-                if vis_state.completed:
-                    if vis_state.final_path:
-                        renderer.update_title(
-                            f"A* Search Complete in {display_city_name} - "
-                            f"Path found with {len(vis_state.final_path)} nodes"
-                        )
-                    else:
-                        renderer.update_title(
-                            f"A* Search in {display_city_name} - No path found"
-                        )
+                    
+                    renderer.update_title(
+                        f"A* Search Complete in {display_city_name} - "
+                        f"Path found with {len(vis_state.final_path)} nodes"
+                    )
                 else:
                     renderer.update_title(
-                        f"A* Search in {display_city_name} - "
-                        f"Nodes explored: {len(vis_state.visited_nodes)}"
+                        f"A* Search in {display_city_name} - No path found"
                     )
                 
                 # Update legend
-                renderer.update_legend(has_path=vis_state.completed and vis_state.final_path)
+                renderer.update_legend(has_path=bool(vis_state.final_path))
                 
                 # Refresh the display
                 renderer.show(block=False)
-                
-                # Capture frame for GIF if recording
-                if recorder:
-                    recorder.capture_frame(renderer.fig)
+            else:
+                # While searching, move the persistent overlays and redraw only them
+                visited_nodes = vis_state.visited_nodes
+                current_node = visited_nodes[-1].item() if len(visited_nodes) else None
+                renderer.update_search(
+                    visited_nodes, vis_state.current_open_set,
+                    current_node, vis_state.current_best_path, vis_state.path_version,
+                    frontier_changed=vis_state.frontier_dirty
+                )
+                vis_state.frontier_dirty = False
+                renderer.update_title(
+                    f"A* Search in {display_city_name} - "
+                    f"Nodes explored: {len(visited_nodes)}"
+                )
+                renderer.blit()
             
+            # Capture frame for GIF if recording
+            if recorder:
+                recorder.capture_frame(renderer.fig)
+        
             # Check if we need to save a GIF
             if vis_state.save_gif_requested and recorder:
                 gif_filename = vis_state.gif_filename
@@ -186,10 +211,6 @@ def visualize_realtime_search(G, start_node, end_node, weight='travel_time', cit
                 
                 # We only need to save once
                 save_result = False
-                
-            # Brief pause to avoid hogging the CPU
-            if not update:
-                time.sleep(0.01)
         
         # Make sure we save the GIF if requested but not yet saved
         if vis_state.save_gif_requested and recorder:
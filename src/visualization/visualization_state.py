@@ -5,8 +5,10 @@ This module contains classes for managing the state of visualizations and proces
 for rendering.
 """
 import time
-import threading
 import queue
+import threading
+import multiprocessing
+import numpy as np
 from enum import Enum
 from src.algorithms.astar import UpdateType
 
@@ -19,36 +21,69 @@ class VisualizationState:
     def __init__(self):
         """Initialize visualization state"""
         # Algorithm state
-        self.visited_nodes = []
+        # Visited node IDs in visit order, in a preallocated int64 buffer of which
+        # the first _nvisited entries are used
+        self._visited = np.empty(4096, dtype=np.int64)
+        self._nvisited = 0
         self.current_open_set = set()
-        self.current_best_path = []
+        self.frontier_dirty = False  # Set when the open set changes, cleared by the renderer loop
+        self.predecessors = {}
+        self.path_tip = None
+        self.path_version = 0  # Bumped whenever the path tip moves
+        self._best_path = []
+        self._best_path_tip = None
         self.final_path = None
         self.completed = False
         self.save_gif_requested = False
         self.gif_filename = None
         
         # Drawing state
-        self.last_update_time = time.time()
         self.update_interval = 0.1  # seconds
+    
+    @property
+    def visited_nodes(self):
+        """
+        Visited node IDs in visit order
+        
+        Returns:
+            np.ndarray: int64 view of the used part of the visited buffer
+        """
+        return self._visited[:self._nvisited]
         
-    def should_update_display(self, force=False):
+    def _extend_visited(self, nodes):
         """
-        Check if the display should be updated based on time interval
+        Append node IDs to the visited buffer, doubling it when full
         
         Args:
-            force: If True, always return True
-            
+            nodes: Array or list of node IDs
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        n, k = self._nvisited, len(nodes)
+        if n + k > len(self._visited):
+            self._visited = np.resize(self._visited, max(2 * len(self._visited), n + k))
+        self._visited[n:n + k] = nodes
+        self._nvisited = n + k
+        
+    @property
+    def current_best_path(self):
+        """
+        Path from the start to the most recently expanded node
+        
+        Rebuilt from the predecessor links only when the path tip has changed.
+        
         Returns:
-            bool: Whether to update the display
+            list: Node IDs along the current best path
         """
-        if force or self.completed:
-            return True
-            
-        current_time = time.time()
-        if current_time - self.last_update_time >= self.update_interval:
-            self.last_update_time = current_time
-            return True
-        return False
+        if self.path_tip != self._best_path_tip:
+            path = [self.path_tip]
+            node = self.path_tip
+            while node in self.predecessors:
+                node = self.predecessors[node]
+                path.append(node)
+            path.reverse()
+            self._best_path = path
+            self._best_path_tip = self.path_tip
+        return self._best_path
         
     def update_from_algorithm(self, update_type, update_data):
         """
@@ -59,19 +94,28 @@ class VisualizationState:
             update_data: The data associated with the update
         """
         if update_type == UpdateType.VISITED_NODE:
-            # Handle both single node and batch updates
-            if isinstance(update_data, list):
-                # Batch update
-                self.visited_nodes.extend(update_data)
-            else:
-                # Single node update (for backward compatibility)
-                self.visited_nodes.append(update_data)
+            # Batch of node IDs (the algorithm only sends batches), copied into
+            # the buffer in one go
+            self._extend_visited(update_data)
             
         elif update_type == UpdateType.OPEN_SET:
             self.current_open_set = set(update_data)
+            self.frontier_dirty = True
+            
+        elif update_type == UpdateType.OPEN_SET_DELTA:
+            # (added, removed) node IDs; a node leaves the open set only after it
+            # entered it, so merged deltas stay correct when added is applied first
+            added, removed = update_data
+            self.current_open_set.update(added)
+            self.current_open_set.difference_update(removed)
+            self.frontier_dirty = True
             
         elif update_type == UpdateType.PATH_UPDATE:
-            self.current_best_path = update_data
+            # (node, parent) links of newly expanded nodes, the last one being the path tip
+            self.predecessors.update(update_data)
+            if update_data and update_data[-1][0] != self.path_tip:
+                self.path_tip = update_data[-1][0]
+                self.path_version += 1
             
         elif update_type == UpdateType.COMPLETE:
             if len(update_data) == 2:
@@ -84,8 +128,9 @@ class VisualizationState:
                 
             self.completed = True
             # Make sure we have all visited nodes
-            if len(full_visited) > len(self.visited_nodes):
-                self.visited_nodes = full_visited
+            if len(full_visited) > self._nvisited:
+                self._visited = np.array(full_visited, dtype=np.int64)
+                self._nvisited = len(self._visited)
                 
             # Check if we should save GIF
             if self.stats and self.stats.get('save_gif', False):
@@ -101,57 +146,199 @@ class VisualizationState:
             self.gif_filename = update_data
 
 
+def coalesce_updates(updates):
+    """
+    Merge a batch of algorithm updates into at most one update per type
+    
+    Visited-node batches, path links and open-set deltas are incremental, so
+    they are concatenated in order. Open-set and progress updates are snapshots,
+    so only the last one is kept, along with the deltas that came after it. Any
+    other updates (COMPLETE, SAVE_GIF) follow in arrival order.
+    
+    Args:
+        updates: List of (update_type, update_data) tuples in arrival order
+        
+    Returns:
+        list: Merged (update_type, update_data) tuples
+    """
+    visited = []
+    links = []
+    open_set = None
+    added = []
+    removed = []
+    progress = None
+    others = []
+    for update_type, update_data in updates:
+        if update_type == UpdateType.VISITED_NODE:
+            visited.append(np.asarray(update_data))
+        elif update_type == UpdateType.PATH_UPDATE:
+            links.extend(update_data)
+        elif update_type == UpdateType.OPEN_SET:
+            open_set = update_data
+            added, removed = [], []
+        elif update_type == UpdateType.OPEN_SET_DELTA:
+            added.extend(update_data[0])
+            removed.extend(update_data[1])
+        elif update_type == UpdateType.PROGRESS:
+            progress = update_data
+        else:
+            others.append((update_type, update_data))
+            
+    merged = []
+    if visited:
+        merged.append((UpdateType.VISITED_NODE, np.concatenate(visited)))
+    if links:
+        merged.append((UpdateType.PATH_UPDATE, links))
+    if open_set is not None:
+        merged.append((UpdateType.OPEN_SET, open_set))
+    if added or removed:
+        merged.append((UpdateType.OPEN_SET_DELTA, (added, removed)))
+    if progress is not None:
+        merged.append((UpdateType.PROGRESS, progress))
+    return merged + others
+
+
+class UpdatePipe:
+    """
+    Single-producer, single-consumer update queue over a one-way pipe
+    
+    A lighter stand-in for multiprocessing.Queue with the same put/get
+    interface. put hands items to a sender thread through a queue.SimpleQueue
+    and returns at once, so the search runs at full speed however far the
+    display falls behind; the sender pickles them into the pipe, which needs
+    no locks with a single producer and consumer.
+    """
+    
+    def __init__(self):
+        """Create the pipe"""
+        self._reader, self._writer = multiprocessing.Pipe(duplex=False)
+        # Created on the first put, in the producing process
+        self._buffer = None
+        self._sender = None
+        
+    def put(self, item):
+        """
+        Send an item to the consumer without blocking
+        
+        Args:
+            item: Picklable object (not None)
+        """
+        if self._sender is None:
+            self._buffer = queue.SimpleQueue()
+            self._sender = threading.Thread(target=self._send_buffered, daemon=True)
+            self._sender.start()
+        self._buffer.put(item)
+        
+    def _send_buffered(self):
+        """Write buffered items into the pipe until the None sentinel (sender thread)"""
+        item = self._buffer.get()
+        while item is not None:
+            self._writer.send(item)
+            item = self._buffer.get()
+            
+    def close(self, stop_event):
+        """
+        Wait for the sender to write out everything put so far
+        
+        Gives up as soon as stop_event is set, since the consumer may no
+        longer be reading; the daemon sender then dies with the process.
+        
+        Args:
+            stop_event: Event signalling that the consumer has stopped
+        """
+        if self._sender is None:
+            return
+        self._buffer.put(None)
+        while self._sender.is_alive() and not stop_event.is_set():
+            self._sender.join(timeout=0.05)
+        
+    def get(self, block=True, timeout=None):
+        """
+        Receive the next item
+        
+        Args:
+            block: Whether to wait for an item
+            timeout: Maximum seconds to wait (None waits forever)
+            
+        Returns:
+            The next item
+            
+        Raises:
+            queue.Empty: If no item arrived in time
+        """
+        if not self._reader.poll(timeout if block else 0):
+            raise queue.Empty
+        return self._reader.recv()
+        
+    def get_nowait(self):
+        """Receive the next item without waiting, raising queue.Empty if there is none"""
+        return self.get(block=False)
+        
+    def empty(self):
+        """Check whether no item is waiting"""
+        return not self._reader.poll()
+
+
 class AlgorithmRunner:
     """
-    Class to manage running algorithm in background thread
+    Class to manage running algorithm in a background process
+    
+    The search runs in its own process so it does not compete with the
+    rendering for the GIL; updates come back over an UpdatePipe.
     """
     
     def __init__(self, algorithm_func, algorithm_args):
         """
         Initialize with algorithm function and its arguments
         
+        The function is called as algorithm_func(*algorithm_args, update_queue,
+        stop_event) in the child process, so the arguments should be what the
+        search needs (e.g. from prepare_search) rather than the whole graph,
+        which would be pickled along with all of its caches.
+        
         Args:
             algorithm_func: Function to run in background
             algorithm_args: Arguments to pass to the function
         """
         self.algorithm_func = algorithm_func
         self.algorithm_args = algorithm_args
-        self.update_queue = queue.Queue()
-        self.stop_event = threading.Event()
-        self.thread = None
+        self.update_queue = UpdatePipe()
+        self.stop_event = multiprocessing.Event()
+        self.process = None
         
     def start(self):
-        """Start the algorithm thread"""
-        if self.thread is not None and self.thread.is_alive():
+        """Start the algorithm process"""
+        if self.process is not None and self.process.is_alive():
             return
             
-        self.thread = threading.Thread(target=self._run)
-        self.thread.daemon = True
-        self.thread.start()
+        self.process = multiprocessing.Process(
+            target=self._run,
+            args=(self.algorithm_func, self.algorithm_args, self.update_queue, self.stop_event)
+        )
+        self.process.daemon = True
+        self.process.start()
         
     def stop(self):
-        """Stop the algorithm thread"""
+        """Stop the algorithm process"""
         self.stop_event.set()
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=1.0)
+        if self.process and self.process.is_alive():
+            self.process.join(timeout=1.0)
+            if self.process.is_alive():
+                self.process.terminate()
             
-    def _run(self):
-        """Run the algorithm function with arguments"""
-        # Get the base arguments
-        G, start_node, end_node, weight = self.algorithm_args[:4]
-        
-        if len(self.algorithm_args) >= 6:
-            # Call with updated parameters
-            self.algorithm_func(
-                G, start_node, end_node, 
-                self.update_queue, self.stop_event, 
-                weight, 
-                heuristic_type=self.algorithm_args[4] if len(self.algorithm_args) > 4 else None,
-                custom_heuristic=self.algorithm_args[5] if len(self.algorithm_args) > 5 else None
-            )
-        else:
-            # Backwards compatibility - use defaults
-            self.algorithm_func(G, start_node, end_node, self.update_queue, self.stop_event, weight)
+    @staticmethod
+    def _run(algorithm_func, algorithm_args, update_queue, stop_event):
+        """
+        Run the algorithm function with arguments (in the child process)
+        
+        A static method so that only the function, its arguments and the
+        queue and event are sent to the child, not the runner itself.
+        """
+        try:
+            algorithm_func(*algorithm_args, update_queue, stop_event)
+        finally:
+            # Flush the remaining updates before the process exits
+            update_queue.close(stop_event)
                            
     def get_update(self, timeout=0.05):
         """
@@ -168,9 +355,46 @@ class AlgorithmRunner:
         except queue.Empty:
             return None
             
+    def get_batch(self, max_wait, max_visited=None):
+        """
+        Collect the updates for one display tick
+        
+        Waits for updates for up to max_wait seconds, stopping early once a
+        COMPLETE update arrives or max_visited visited-node batches have been
+        collected. Anything left stays queued for the next tick.
+        
+        Args:
+            max_wait: Maximum seconds to spend collecting
+            max_visited: Optional cap on visited-node batches per tick, to pace the animation
+            
+        Returns:
+            list: (update_type, update_data) tuples in arrival order (empty if none arrived)
+        """
+        updates = []
+        visited_batches = 0
+        deadline = time.monotonic() + max_wait
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    update = self.update_queue.get(timeout=remaining)
+                else:
+                    update = self.update_queue.get_nowait()
+            except queue.Empty:
+                break
+                
+            updates.append(update)
+            if update[0] == UpdateType.COMPLETE:
+                break
+            if update[0] == UpdateType.VISITED_NODE:
+                visited_batches += 1
+                if max_visited and visited_batches >= max_visited:
+                    break
+        return updates
+        
     def is_alive(self):
-        """Check if the algorithm thread is still running"""
-        return self.thread is not None and self.thread.is_alive()
+        """Check if the algorithm process is still running"""
+        return self.process is not None and self.process.is_alive()
         
     def has_updates(self):
         """Check if there are updates in the queue"""